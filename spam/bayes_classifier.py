@@ -3,8 +3,17 @@ import os
 import re
 from pathlib import Path
 import pickle
+import hashlib
+import itertools
+import json
+import time
+
+from lecture_mime import MAX_OCTETS_LUS, texteMail, texteMime
+from vocabulaire import chargerVocabulaire, ecrireVocabulaire, octetsVocabulaire
 
 epsilon = .1
+LECTEURS = ("texte", "mime") # Lecteurs de mails : texte brut ou analyse MIME (voir lecture_mime.py)
+_generations = itertools.count(1) # Numéros d'état des classifieurs, uniques dans le processus
 
 # ======================================================================================
 # 								ALGORITHME NAIF DE BAYES
@@ -19,22 +28,109 @@ epsilon = .1
 
 	@return Dictionnaire chargé.
 '''
-def lireMail(fichier, dictionnaire : list):
+def lireMail(fichier, dictionnaire : list, lecteur = "texte"):
 	try:
-		with open(fichier, "r", encoding="utf-8", errors="ignore") as file:
-			texte = file.read().lower() # Lit le fichier et met tout en lowercase
+		texte = lireTexte(fichier, lecteur)
 	except Exception as ex:
 		print(f"Erreur lors de la lecture de {fichier} : {ex}")
 		return np.zeros(len(dictionnaire), dtype=bool)
 
+	return vecteurMots(extraireMots(texte), dictionnaire)
+
+
+'''
+	@brief	Lit le texte d'un mail en lowercase avec un lecteur de LECTEURS.
+
+	@param fichier : Chemin du mail.
+	@param lecteur : "texte" (fichier entier) ou "mime" (parties texte décodées, voir lecture_mime.py).
+
+	@return Texte du mail.
+'''
+def lireTexte(fichier, lecteur = "texte"):
+	if lecteur == "mime":
+		return texteMail(fichier)
+	with open(fichier, "r", encoding="utf-8", errors="ignore") as file:
+		return file.read().lower() # Lit le fichier et met tout en lowercase
+
+
+'''
+	@brief	Texte en lowercase d'un mail déjà en mémoire, comme lireTexte pour un fichier.
+
+	@param contenu : Contenu du mail (octets ou chaîne).
+	@param lecteur : Lecteur de LECTEURS.
+
+	@return Texte du mail.
+'''
+def texteContenu(contenu, lecteur = "texte"):
+	if lecteur == "mime":
+		if isinstance(contenu, str):
+			contenu = contenu.encode("utf-8", errors="ignore")
+		return texteMime(contenu[:MAX_OCTETS_LUS])
+	if isinstance(contenu, bytes):
+		contenu = contenu.decode("utf-8", errors="ignore")
+	return contenu.lower()
+
+
+'''
+	@brief	Lit le contenu brut d'un mail, borné à MAX_OCTETS_LUS pour le lecteur "mime"
+	(le reste du fichier ne serait pas analysé).
+
+	@param fichier : Chemin du mail.
+	@param lecteur : Lecteur de LECTEURS.
+
+	@return Contenu du mail en octets.
+'''
+def lireContenu(fichier, lecteur = "texte"):
+	with open(fichier, "rb") as file:
+		return file.read(MAX_OCTETS_LUS if lecteur == "mime" else -1)
+
+
+'''
+	@brief	Vérifie qu'un lecteur fait partie de LECTEURS (lève ValueError sinon).
+'''
+def verifierLecteur(lecteur):
+	if lecteur not in LECTEURS:
+		raise ValueError(f"Lecteur inconnu : {lecteur} (attendu : {', '.join(LECTEURS)})")
+
+
+'''
+	@brief	Lecteur de mails avec lequel un classifieur a été appris ("texte" pour les
+	classifieurs qui ne le précisent pas) : il doit être utilisé pour le tester et classer.
+'''
+def lecteurClassifieur(classifieur):
+	return classifieur.get("lecteur", "texte")
+
+
+'''
+	@brief	Extrait les mots de 3 lettres ou plus d'un texte déjà mis en lowercase.
+
+	@param texte : Contenu du mail.
+
+	@return Liste des mots du texte.
+'''
+def extraireMots(texte):
 	# pre-traitement sur texte 
 	texte = re.sub(r'[^a-z\s]', ' ', texte)
 
-    # Extraction des mots de 3 lettres ou plus
-	mots = re.findall(r'\b[a-z]{3,}\b', texte)
+	# Extraction des mots de 3 lettres ou plus
+	return re.findall(r'\b[a-z]{3,}\b', texte)
+
 
+'''
+	@brief	Construit le vecteur booléen des mots du dictionnaire présents dans une liste de mots.
+
+	@param mots : Mots extraits d'un mail.
+	@param dictionnaire : Mots connus (liste ou vocabulaire compact).
+
+	@return Vecteur booléen de taille len(dictionnaire).
+'''
+def vecteurMots(mots, dictionnaire):
 	x = np.zeros(len(dictionnaire), dtype=bool)
 
+	if hasattr(dictionnaire, "indices"): # Vocabulaire compact : recherche par lot
+		x[dictionnaire.indices(mots)] = True
+		return x
+
 	for mot in mots:
 		try:
 			i = dictionnaire.index(mot)
@@ -61,6 +157,33 @@ def charge_dico(fichier):
 	return [str.lower(mot) for mot in mots  if len(mot) > 2] # Retire les mots avec moins de 3 lettres
 
 
+'''
+	@brief	Compte, pour chaque mot du dictionnaire, le nombre de fichiers d'un dossier qui le contiennent.
+
+	@param dossier : Chemin du dossier contenant les données à apprendre.
+	@param fichiers : Noms des fichiers des données à apprendre.
+	@param dictionnaire : Mots connus sur lesquels apprendre.
+
+	@param lecteur : Lecteur des mails (voir LECTEURS).
+	@param journal : Journal d'ingestion dans lequel noter les mails lus (voir journalClassifieur).
+	@param isSpam : Classe des mails, notée dans le journal.
+
+	@return Un vecteur de comptes de taille len(dictionnaire).
+'''
+def compteBinomial(dossier, fichiers, dictionnaire, lecteur = "texte", journal = None, isSpam = None):
+	n = np.zeros(len(dictionnaire))
+
+	for fichier in fichiers:
+		chemin_fichier = dossier + "/" + fichier
+		if journal is None:
+			x = lireMail(chemin_fichier, dictionnaire, lecteur)  # vecteur binaire du mail
+		else:
+			x = lireMailJournal(chemin_fichier, dictionnaire, lecteur, journal, isSpam)
+		n += x 
+
+	return n
+
+
 '''
 	@brief	Fonction d'apprentissage d'une loi binomiale a partir des fichiers d'un dossier
 
@@ -71,15 +194,8 @@ def charge_dico(fichier):
 	@return Un vecteur b de paramètres 
 '''
 def apprendBinomial(dossier, fichiers, dictionnaire):
-	m = len(dictionnaire)
 	N = len(fichiers)
-
-	b = np.zeros(m)
-
-	for fichier in fichiers:
-		chemin_fichier = dossier + "/" + fichier
-		x = lireMail(chemin_fichier, dictionnaire)  # vecteur binaire du mail
-		b += x 
+	b = compteBinomial(dossier, fichiers, dictionnaire)
 
 	global epsilon
 
@@ -100,10 +216,12 @@ def apprendBinomial(dossier, fichiers, dictionnaire):
 	@param Pham : Probabilité que le mail soit un HAM.
 	@param bspam : Vecteur des probabilités des mots appris étant susceptibles d'être dans un SPAM.
 	@param bham : Vecteur des probabilités des mots appris étant susceptibles d'être dans un HAM.
+	@param seuil : Le mail est un SPAM si logPspam - logPham > seuil.
+	@param biais : Terme constant ajouté à logPspam - logPham (mots retirés d'un modèle élagué).
 			
 	@return Le taux d'erreur 
 '''
-def prediction(x, Pspam, Pham, bspam, bham):
+def prediction(x, Pspam, Pham, bspam, bham, seuil = 0, biais = 0):
 	"""
 		Retourne True ou False.
 	"""
@@ -120,7 +238,7 @@ def prediction(x, Pspam, Pham, bspam, bham):
 	if np.isnan(logPham) or np.isnan(logPspam): 
 		print("NaN")
 
-	logPspam += np.log(Pspam)
+	logPspam += np.log(Pspam) + biais
 	logPham += np.log(Pham)
 
 	# Interprétation des sommes de log en probabilités entre ]0;1[ à l'aide de la fonction sigmoïde
@@ -128,34 +246,142 @@ def prediction(x, Pspam, Pham, bspam, bham):
 	Pham_x = 1 - Pspam_x
 	
 	# Checking SPAM ou HAM
-	isSpam = (logPspam > logPham)
+	isSpam = (logPspam - logPham > seuil)
 
 	return isSpam, Pspam_x, Pham_x
 
 
+'''
+	@brief	Réécrit le modèle sous forme de log-odds : log P(SPAM|x) - log P(HAM|x) = biais + somme des poids[j]
+	pour les mots j présents dans le mail.
+
+	@param Pspam, Pham, bspam, bham : Paramètres du modèle.
+
+	@return Le couple (biais, poids).
+'''
+def poidsLogOdds(Pspam, Pham, bspam, bham):
+	poids = np.log(bspam) - np.log(1 - bspam) - np.log(bham) + np.log(1 - bham)
+	biais = np.log(Pspam) - np.log(Pham) + np.sum(np.log(1 - bspam) - np.log(1 - bham))
+	return biais, poids
+
+
+'''
+	@brief	Poids log-odds d'un classifieur, y compris le biais des mots retirés s'il a été élagué.
+
+	@return Le couple (biais, poids).
+'''
+def poidsClassifieur(classifieur):
+	Pspam, Pham, bspam, bham = (classifieur[k] for k in ["Pspam", "Pham", "bspam", "bham"])
+	biais, poids = poidsLogOdds(Pspam, Pham, bspam, bham)
+	return biais + classifieur.get("biais_elague", 0), poids
+
+
+'''
+	@brief	Prépare un modèle pour la prédiction avec arrêt anticipé : le vocabulaire est trié
+	une fois pour toutes par poids absolu décroissant.
+
+	@param poids : Poids des mots du modèle (voir poidsLogOdds).
+
+	@return (rang, poids_tries, absolus_tries) où rang[j] est la position du mot j dans
+	l'ordre, poids_tries les poids dans cet ordre et absolus_tries leurs valeurs absolues.
+'''
+def ordreAnticipe(poids):
+	ordre = np.argsort(-np.abs(poids), kind="stable")
+	rang = np.empty(len(poids), dtype=np.intp)
+	rang[ordre] = np.arange(len(poids))
+	poids_tries = poids[ordre]
+	return rang, poids_tries, np.abs(poids_tries)
+
+
+'''
+	@brief	Prédiction avec arrêt anticipé : les mots présents dans le mail sont parcourus par
+	poids absolu décroissant et le calcul s'arrête dès que la somme des poids restants ne
+	peut plus changer la décision.
+
+	@param indices : Indices des mots du dictionnaire présents dans le mail.
+	@param biais : Biais du modèle (voir poidsLogOdds).
+	@param ordre : Modèle préparé par ordreAnticipe.
+	@param seuil : Le mail est un SPAM si le score log-odds dépasse ce seuil.
+
+	@return (isSpam, Pspam_x, Pham_x, approx, nb_termes) où approx indique que les
+	probabilités sont calculées sur une somme partielle et nb_termes est le nombre de
+	poids effectivement additionnés.
+'''
+def predictionAnticipee(indices, biais, ordre, seuil = 0):
+	rang, poids_tries, absolus_tries = ordre
+	positions = rang[indices]
+	positions.sort()
+	w = poids_tries.take(positions).tolist()
+
+	# reste : borne sur la contribution des termes pas encore additionnés
+	reste = float(absolus_tries.take(positions).sum())
+	score = float(biais)
+	k = 0
+	while k < len(w) and abs(score - seuil) <= reste:
+		score += w[k]
+		reste -= abs(w[k])
+		k += 1
+
+	Pspam_x = 1 / (1 + np.exp(-score))
+	return (score > seuil), Pspam_x, 1 - Pspam_x, k < len(w), k
+
+
+'''
+	@brief	Prédiction vectorisée d'un lot de mails donné sous forme creuse : pour chaque
+	couple (mail, mot présent), le numéro du mail dans le lot et l'indice du mot dans le
+	dictionnaire. Le coût est proportionnel au nombre de mots présents, pas à la taille du
+	dictionnaire.
+
+	@param lignes : Numéros des mails (entiers).
+	@param colonnes : Indices des mots présents (entiers, même longueur que lignes).
+	@param nb_mails : Nombre de mails du lot.
+	@param biais : Biais du modèle (voir poidsClassifieur).
+	@param poids : Poids des mots du modèle (voir poidsClassifieur).
+	@param seuil : Le mail est un SPAM si le score log-odds dépasse ce seuil.
+
+	@return (isSpam, Pspam_x, scores) : tableaux des décisions, des probabilités d'être un
+	SPAM et des scores log-odds.
+'''
+def predictionLot(lignes, colonnes, nb_mails, biais, poids, seuil = 0):
+	scores = biais + np.bincount(lignes, weights=poids[colonnes], minlength=nb_mails)
+	Pspam_x = 1 / (1 + np.exp(-np.clip(scores, -500, 500)))
+	return scores > seuil, Pspam_x, scores
+
+
 '''
 	@brief	Teste le classifieur de paramètres Pspam, Pham, bspam, bhamsur 
 	sur tous les fichiers d'un dossier étiquetés comme SPAM si isSpam et HAM sinon
 		
 	@return Le taux d'erreur 
 '''
-def test(dossier, dictionnaire, isSpam, Pspam, Pham, bspam, bham):
+def test(dossier, dictionnaire, isSpam, Pspam, Pham, bspam, bham, anticipe = False, seuil = 0, biais_elague = 0, lecteur = "texte"):
 	fichiers = os.listdir(dossier)
 	nb_erreurs = 0
 	total_mails = len(fichiers)
+
+	if anticipe:
+		biais, poids = poidsLogOdds(Pspam, Pham, bspam, bham)
+		biais += biais_elague
+		ordre = ordreAnticipe(poids)
 	
 	for i in range(total_mails):
 		fichier = fichiers[i]
 
 		chemin_fichier = dossier + "/" + fichier		
-		x = lireMail(chemin_fichier, dictionnaire)
-		isSpam_pred, Pspam_x, Pham_x = prediction(x, Pspam, Pham, bspam, bham)
+		x = lireMail(chemin_fichier, dictionnaire, lecteur)
+		approx = False
+		if anticipe:
+			isSpam_pred, Pspam_x, Pham_x, approx, _ = predictionAnticipee(np.flatnonzero(x), biais, ordre, seuil)
+		else:
+			isSpam_pred, Pspam_x, Pham_x = prediction(x, Pspam, Pham, bspam, bham, seuil, biais_elague)
 
 		if isSpam_pred != isSpam:
 			nb_erreurs += 1
 
 		output = f"SPAM numéro {i} :" if isSpam else f"HAM numéro {i} :"
 		output += f" P(Y=SPAM | X=x) = {Pspam_x} P(Y=HAM | X=x) = {Pham_x}"
+		if approx:
+			output += " (approx.)"
 
 		if isSpam_pred and isSpam: 
 			output += " => identifié comme un SPAM*" 
@@ -176,22 +402,129 @@ def test(dossier, dictionnaire, isSpam, Pspam, Pham, bspam, bham):
 # ======================================================================================
 
 
+'''
+	@brief Construit un classifieur à partir de dossiers de SPAM et de HAM.
+
+	@param dossier_spams : Dossier des SPAM d'apprentissage.
+	@param dossier_hams : Dossier des HAM d'apprentissage.
+	@param dictionnaire : Mots connus sur lesquels apprendre.
+	@param fichiers_spams : Noms des SPAM à apprendre (tout le dossier par défaut).
+	@param fichiers_hams : Noms des HAM à apprendre (tout le dossier par défaut).
+	@param lecteur : Lecteur des mails (voir LECTEURS), noté dans le classifieur.
+
+	@return Un classifieur.
+'''
+def creerClassifieur(dossier_spams, dossier_hams, dictionnaire, fichiers_spams = None, fichiers_hams = None, lecteur = "texte"):
+	verifierLecteur(lecteur)
+
+	if fichiers_spams is None:
+		fichiers_spams = os.listdir(dossier_spams)
+	if fichiers_hams is None:
+		fichiers_hams = os.listdir(dossier_hams)
+
+	# Les mails appris sont notés dans le journal : une mise à jour ultérieure les reconnaît
+	journal = {"empreintes": {}, "fichiers": {}}
+	nspam = compteBinomial(dossier_spams, fichiers_spams, dictionnaire, lecteur, journal, True)
+	nham = compteBinomial(dossier_hams, fichiers_hams, dictionnaire, lecteur, journal, False)
+
+	return classifieurDepuisComptes(dictionnaire, nspam, len(fichiers_spams), nham, len(fichiers_hams), lecteur, journal)
+
+
+'''
+	@brief Construit un classifieur à partir des comptes par mot et du nombre de mails de chaque classe.
+
+	@param lecteur : Lecteur avec lequel les mails ont été lus (voir LECTEURS).
+	@param journal : Journal d'ingestion des mails comptés (voir journalClassifieur), s'il est connu.
+
+	@return Un classifieur.
+'''
+def classifieurDepuisComptes(dictionnaire, nspam, mSpam, nham, mHam, lecteur = "texte", journal = None):
+	global epsilon
+
+	total = mSpam + mHam
+	classifieur = {
+		"Pspam": mSpam / total,
+		"Pham": mHam / total,
+		"bspam": (nspam + epsilon) / (mSpam + 2 * epsilon),
+		"bham": (nham + epsilon) / (mHam + 2 * epsilon),
+		"dictionnaire": dictionnaire,
+		"mSpam": mSpam,
+		"mHam": mHam,
+		"nspam": nspam,
+		"nham": nham,
+		"lecteur": lecteur,
+		"generation": generationSuivante()
+	}
+	if journal is not None:
+		classifieur["journal"] = journal
+	return classifieur
+
+
+'''
+	@brief	Renvoie un nouveau numéro de génération. Chaque création, chargement ou mise à jour
+	d'un classifieur lui en attribue un : deux états différents d'un modèle n'ont jamais le
+	même numéro dans un processus (utilisé par exemple pour invalider un cache de verdicts).
+'''
+def generationSuivante():
+	return next(_generations)
+
+
 '''
 	@brief Fonctionne exactement comme test mais à partir d'un classifieur 
 	sous forme de structure plutôt que de toute la liste des paramètres.
 
 	@param dossier : Dossier des mails à tester. 
 	@param classifier :
+	@param anticipe : Utilise la prédiction avec arrêt anticipé (voir predictionAnticipee).
 
 	@return Le taux d'erreur.
 '''
-def testClassifieur(dossier, isSpam, classifieur):
+def testClassifieur(dossier, isSpam, classifieur, anticipe = False):
 	Pspam, Pham, bspam, bham, dictionnaire = (classifieur[k] for k in ["Pspam", "Pham", "bspam", "bham", "dictionnaire"])
-	return test(dossier, dictionnaire, isSpam, Pspam, Pham, bspam, bham)
+	return test(dossier, dictionnaire, isSpam, Pspam, Pham, bspam, bham, anticipe, classifieur.get("seuil", 0), classifieur.get("biais_elague", 0), lecteurClassifieur(classifieur))
+
+
+'''
+	@brief	Liste les mails étiquetés d'une base de test.
 
+	@param base : Dossier contenant les sous-dossiers spam/ et ham/.
 
+	@return Liste de couples (chemin, isSpam).
 '''
-	@brief Sauvegarde un classifieur.
+def mails_etiquetes(base = "basetest"):
+	mails = []
+	for label, isSpam in (("spam", True), ("ham", False)):
+		dossier = os.path.join(base, label)
+		mails += [(os.path.join(dossier, f), isSpam) for f in sorted(os.listdir(dossier))]
+	return mails
+
+
+'''
+	@brief	Renvoie le chemin du vocabulaire compact d'un classifieur sauvegardé, nommé
+	d'après l'empreinte de son contenu.
+'''
+def cheminVocabulaire(dossier, nom, empreinte):
+	return os.path.join(dossier, f"{nom}.{empreinte}.voc")
+
+
+'''
+	@brief	Liste les vocabulaires compacts écrits pour une sauvegarde (y compris l'ancien
+	nom <nom>.voc), qu'ils soient encore référencés ou non.
+'''
+def vocabulairesSauvegarde(dossier, nom):
+	motif = re.compile(re.escape(nom) + r"(\.[0-9a-f]{16})?\.voc")
+	return [os.path.join(dossier, f) for f in os.listdir(dossier) if motif.fullmatch(f)]
+
+
+'''
+	@brief Sauvegarde un classifieur. Le dictionnaire est écrit à part, en vocabulaire compact
+	(saves/<nom>.<empreinte>.voc, voir vocabulaire.py), et la sauvegarde n'en garde que la
+	référence ("vocabulaire") : le chargement le projette en mémoire au lieu de recréer une
+	liste. Le vocabulaire n'est jamais réécrit sur place : un nouveau contenu va dans un
+	nouveau fichier, synchronisé avant le remplacement de la sauvegarde, et les anciens
+	fichiers ne sont supprimés qu'ensuite.
+	Chaque sauvegarde reçoit un identifiant unique ("id_sauvegarde"), repris par les lignes
+	de journal écrites ensuite (voir journal_maj.py).
 
 	@param dossier : Chemin du dossier dans lequel enregistrer le classifieur.
 	@param nom : Nom du fichier à enregistrer.
@@ -200,17 +533,44 @@ def sauvegarderClassifieur(classifieur, dossier = "saves", nom = "classifieur.pk
 	if not os.path.exists(dossier):
 		os.makedirs(dossier)
 	chemin_fichier = os.path.join(dossier,nom)
+	identifiant = os.urandom(8).hex()
+	chemin_vocabulaire = None
 	try:
-		with open(chemin_fichier,"wb") as f:
-			pickle.dump(classifieur,f)
-			return 1
+		sauvegarde = dict(classifieur, id_sauvegarde=identifiant)
+		if "dictionnaire" in classifieur:
+			# Le vocabulaire est écrit (et synchronisé) avant la sauvegarde qui y renvoie
+			contenu = octetsVocabulaire(classifieur["dictionnaire"])
+			chemin_vocabulaire = cheminVocabulaire(dossier, nom, hashlib.blake2b(contenu, digest_size=8).hexdigest())
+			if not os.path.exists(chemin_vocabulaire):
+				ecrireVocabulaire(contenu, chemin_vocabulaire)
+			del sauvegarde["dictionnaire"]
+			sauvegarde["vocabulaire"] = {"fichier": os.path.basename(chemin_vocabulaire), "mots": len(classifieur["dictionnaire"])}
+
+		# Écriture dans un fichier temporaire puis remplacement : un arrêt brutal ne laisse
+		# jamais de sauvegarde à moitié écrite
+		with open(chemin_fichier + ".tmp","wb") as f:
+			pickle.dump(sauvegarde,f)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(chemin_fichier + ".tmp", chemin_fichier)
 	except:
 		print("Une erreur est suvrenue\nLe classifieur n'a pas pu être sauvegardé correctement.\n")
 		return None
 
+	# Les vocabulaires des sauvegardes précédentes ne sont plus référencés
+	for chemin in vocabulairesSauvegarde(dossier, nom):
+		if chemin != chemin_vocabulaire:
+			os.remove(chemin)
+
+	classifieur["id_sauvegarde"] = identifiant
+	inscrireCatalogue(classifieur, dossier, nom)
+	return 1
+
 
 '''
 	@brief Charge un classifieur et renvoie un objet classifieur, qui peut être ensuite utilisé.
+	Les mises à jour de son journal (voir journal_maj.py) écrites depuis cette sauvegarde
+	(même "id_sauvegarde") et qui n'y sont pas déjà sont rejouées.
 
 	@dossier : Checmin du dossier dans lequel a été enregistré le classifieur.i
 
@@ -223,36 +583,509 @@ def chargerClassifieur(dossier = "saves", nom = "classifieur.pkl"):
 		return None
 	else: 
 		with open(chemin_fichier,"rb") as f:
-			return pickle.load(f)
+			classifieur = pickle.load(f)
+		if "bspam" not in classifieur: # Modèle quantifié (voir quantification.chargerModeleQuantifie)
+			print(f"Erreur -> {nom} n'est pas un classifieur complet.")
+			return None
+		if "vocabulaire" in classifieur:
+			vocabulaire = classifieur.pop("vocabulaire")
+			classifieur["dictionnaire"] = chargerVocabulaire(os.path.join(dossier, vocabulaire["fichier"]))
+			if classifieur["dictionnaire"] is None:
+				return None
+			if len(classifieur["dictionnaire"]) != vocabulaire["mots"]:
+				print(f"Erreur -> Le vocabulaire {vocabulaire['fichier']} ne correspond pas à {nom}.")
+				return None
 
+		seq = classifieur.get("seq_journal", 0)
+		for maj in lireJournal(dossier, nom):
+			# Une ligne d'une autre sauvegarde (remplacée depuis) n'est jamais rejouée
+			if maj.get("sauvegarde") == classifieur.get("id_sauvegarde") and maj["seq"] > seq:
+				appliquerMaj(maj, classifieur)
+				seq = maj["seq"]
+		classifieur["seq_journal"] = seq
 
-def updateClassifieur(chemin_mail, isSpam, classifieur):
-	global epsilon 
+		classifieur["generation"] = generationSuivante()
+		return classifieur
+
+
+'''
+	@brief	Renvoie, pour une classe, le vecteur du nombre de mails appris contenant chaque mot.
+	Les classifieurs plus anciens ne stockent pas ces comptes : on les retrouve alors en
+	inversant le lissage de Laplace.
+
+	@param classifieur : Classifieur.
+	@param isSpam : Classe SPAM si True, HAM sinon.
+
+	@return Vecteur des comptes de la classe.
+'''
+def comptesClassifieur(classifieur, isSpam):
+	global epsilon
+
+	cle_n, cle_b, cle_m = ("nspam", "bspam", "mSpam") if isSpam else ("nham", "bham", "mHam")
+	if cle_n in classifieur:
+		return classifieur[cle_n]
+
+	m = classifieur[cle_m]
+	return np.rint(classifieur[cle_b] * (m + 2 * epsilon) - epsilon)
+
+
+'''
+	@brief	Ajoute (poids > 0) ou retire (poids < 0) un mail vectorisé des comptes d'une classe
+	puis recalcule les paramètres du classifieur.
+
+	@param x : Vecteur booléen des mots du mail.
+	@param isSpam : Classe SPAM si True, HAM sinon.
+	@param classifieur : Classifieur à mettre à jour.
+	@param poids : Nombre de fois que le mail est ajouté (négatif pour le retirer).
+'''
+def majVecteur(x, isSpam, classifieur, poids = 1):
+	global epsilon
+
+	if estElague(classifieur):
+		raise ValueError("Un classifieur élagué ne peut pas être mis à jour.")
+
+	cle_n, cle_b, cle_m = ("nspam", "bspam", "mSpam") if isSpam else ("nham", "bham", "mHam")
+	n = comptesClassifieur(classifieur, isSpam) + poids * x
+	m = classifieur[cle_m] + poids
 
+	classifieur[cle_n] = n
+	classifieur[cle_b] = (n + epsilon) / (m + 2 * epsilon)
+	classifieur[cle_m] = m
+
+	total = classifieur["mHam"] + classifieur["mSpam"]
+	classifieur["Pspam"] = classifieur["mSpam"] / total
+	classifieur["Pham"] = classifieur["mHam"] / total
+	classifieur["generation"] = generationSuivante()
+
+
+'''
+	@brief	Indique si un classifieur a été élagué (voir compaction.py). Son biais_elague
+	dépend des probabilités des mots retirés, qui ne sont plus connues : un classifieur
+	élagué est en lecture seule (ni mise à jour, ni fusion). Pour l'enrichir, on met à jour
+	le modèle complet puis on l'élague de nouveau.
+'''
+def estElague(classifieur):
+	return "biais_elague" in classifieur
+
+
+def updateClassifieur(chemin_mail, isSpam, classifieur):
 	if classifieur == None:
 		print("Erreur lors de la récupération du classifieur")
 		return
+	if estElague(classifieur):
+		print("Erreur -> Un classifieur élagué ne peut pas être mis à jour.")
+		return
 	
 	dictionnaire = classifieur["dictionnaire"]
-	x = lireMail(chemin_mail, dictionnaire).astype(float)
-	
-	if isSpam:
-		old_m = classifieur["mSpam"]
-		old_nj = classifieur["bspam"] * (old_m + 2 * epsilon) - epsilon
-		new_nj = old_nj + x
-		new_m = old_m + 1
-		classifieur["bspam"] = (new_nj + epsilon) / (new_m + 2 * epsilon)
-		classifieur["mSpam"] = new_m
-	else: 
-		old_m = classifieur["mHam"]
-		old_nj = classifieur["bham"] * (old_m + 2 * epsilon) - epsilon
-		new_nj = old_nj + x
-		new_m = old_m + 1
-		classifieur["bham"] = (new_nj + epsilon) / (new_m + 2 * epsilon)
-		classifieur["mHam"] = new_m	
+	x = lireMail(chemin_mail, dictionnaire, lecteurClassifieur(classifieur))
+	majVecteur(x, isSpam, classifieur)
+
+	print("Le classifieur a été mis à jour avec le nouveau mail : ", chemin_mail)
+
+
+'''
+	@brief	Fusionne des classifieurs appris sur le même dictionnaire en additionnant
+	leurs comptes par mot et leurs nombres de mails. Le résultat est identique à un
+	classifieur appris sur la réunion de leurs corpus.
+
+	@param classifieurs : Liste des classifieurs à fusionner.
+
+	@return Le classifieur fusionné, None si les dictionnaires ou les lecteurs diffèrent ou
+	si l'un des classifieurs est élagué.
+'''
+def fusionnerClassifieurs(classifieurs):
+	classifieurs = list(classifieurs)
+	if not classifieurs:
+		print("Aucun classifieur à fusionner.")
+		return None
+	if any(estElague(c) for c in classifieurs):
+		print("Erreur -> Un classifieur élagué ne peut pas être fusionné.")
+		return None
+
+	dictionnaire = classifieurs[0]["dictionnaire"]
+	for classifieur in classifieurs[1:]:
+		if classifieur["dictionnaire"] != dictionnaire:
+			print("Erreur -> Les classifieurs n'ont pas été appris sur le même dictionnaire.")
+			return None
+		if lecteurClassifieur(classifieur) != lecteurClassifieur(classifieurs[0]):
+			print("Erreur -> Les classifieurs n'ont pas été appris avec le même lecteur de mails.")
+			return None
+
+	nspam = sum(comptesClassifieur(c, True) for c in classifieurs)
+	nham = sum(comptesClassifieur(c, False) for c in classifieurs)
+	mSpam = sum(c["mSpam"] for c in classifieurs)
+	mHam = sum(c["mHam"] for c in classifieurs)
+	fusion = classifieurDepuisComptes(dictionnaire, nspam, mSpam, nham, mHam, lecteurClassifieur(classifieurs[0]))
+
+	# Réunion des journaux d'ingestion
+	for classifieur in classifieurs:
+		if "journal" in classifieur:
+			journal = journalClassifieur(fusion)
+			journal["empreintes"].update(classifieur["journal"]["empreintes"])
+			journal["fichiers"].update(classifieur["journal"]["fichiers"])
+
+	return fusion
+
+
+# ======================================================================================
+# 								JOURNAL D'INGESTION
+# ======================================================================================
+
+
+'''
+	@brief	Renvoie le journal d'ingestion d'un classifieur, en le créant si besoin.
+	Le journal associe l'empreinte du contenu de chaque mail appris à sa classe
+	("empreintes") et la signature (taille, date de modification) de chaque fichier
+	déjà vu à son empreinte ("fichiers").
+
+	@param classifieur : Classifieur.
+
+	@return Le journal.
+'''
+def journalClassifieur(classifieur):
+	return classifieur.setdefault("journal", {"empreintes": {}, "fichiers": {}})
+
+
+'''
+	@brief	Renvoie le chemin du journal des mises à jour d'un classifieur sauvegardé.
+'''
+def cheminJournal(dossier, nom):
+	return os.path.join(dossier, nom + ".log")
+
+
+'''
+	@brief	Lit les mises à jour du journal d'un classifieur sauvegardé, en ignorant une
+	éventuelle dernière ligne incomplète.
+
+	@return Liste des mises à jour dans l'ordre du journal.
+'''
+def lireJournal(dossier = "saves", nom = "classifieur.pkl"):
+	chemin = cheminJournal(dossier, nom)
+	if not os.path.exists(chemin):
+		return []
+
+	with open(chemin, "rb") as f:
+		lignes = f.read().split(b"\n")
+
+	# La dernière ligne est vide si le journal est complet, partielle sinon
+	return [json.loads(ligne) for ligne in lignes[:-1]]
+
+
+'''
+	@brief	Lit un mail et le note dans un journal d'ingestion (empreinte du contenu et
+	signature du fichier), comme s'il avait été appris par apprendreMail.
+
+	@param journal : Journal d'ingestion (voir journalClassifieur).
+	@param isSpam : Classe du mail.
+
+	@return Vecteur booléen des mots du dictionnaire présents dans le mail.
+'''
+def lireMailJournal(chemin_mail, dictionnaire, lecteur, journal, isSpam):
+	chemin_mail = os.path.abspath(chemin_mail)
+	try:
+		st = os.stat(chemin_mail)
+		contenu = lireContenu(chemin_mail, lecteur)
+	except Exception as ex:
+		print(f"Erreur lors de la lecture de {chemin_mail} : {ex}")
+		return np.zeros(len(dictionnaire), dtype=bool)
+
+	empreinte = hashlib.blake2b(contenu, digest_size=16).hexdigest()
+	journal["empreintes"][empreinte] = isSpam
+	journal["fichiers"][chemin_mail] = ((st.st_size, st.st_mtime_ns), empreinte)
+	return vecteurMots(extraireMots(texteContenu(contenu, lecteur)), dictionnaire)
+
+
+'''
+	@brief	Applique au classifieur une mise à jour préparée par apprendreMail. Une mise à jour
+	est un dictionnaire {"fichier", "signature", "empreinte", "isSpam", "ancien", "indices"}
+	où "ancien" est la classe sous laquelle le mail avait déjà été appris (None sinon) et
+	"indices" les mots du dictionnaire présents dans le mail (None si rien n'est à apprendre).
+
+	@param maj : Mise à jour.
+	@param classifieur : Classifieur à mettre à jour.
+'''
+def appliquerMaj(maj, classifieur):
+	journal = journalClassifieur(classifieur)
+	journal["fichiers"][maj["fichier"]] = (tuple(maj["signature"]), maj["empreinte"])
+	if maj["indices"] is None:
+		return
+
+	x = np.zeros(len(classifieur["dictionnaire"]), dtype=bool)
+	x[maj["indices"]] = True
+
+	# Changement d'étiquette : soustraction de l'ancienne classe puis ajout à la nouvelle
+	if maj["ancien"] is not None:
+		majVecteur(x, maj["ancien"], classifieur, -1)
+	majVecteur(x, maj["isSpam"], classifieur)
+	journal["empreintes"][maj["empreinte"]] = maj["isSpam"]
+
+
+'''
+	@brief	Apprend un mail en tenant compte du journal d'ingestion : un mail déjà appris
+	avec la même classe est ignoré, un mail déjà appris avec l'autre classe est retiré
+	de celle-ci avant d'être ajouté à la nouvelle.
+
+	@param chemin_mail : Chemin du mail.
+	@param isSpam : Classe SPAM si True, HAM sinon.
+	@param classifieur : Classifieur à mettre à jour.
+	@param signature : Signature (taille, date de modification) du fichier si déjà connue.
+	@param majs : Liste à laquelle ajouter la mise à jour appliquée (voir appliquerMaj).
+
+	@return "nouveau", "inverse" ou "ignore" selon ce qui a été fait, None en cas d'erreur
+	(ou si le classifieur est élagué).
+'''
+def apprendreMail(chemin_mail, isSpam, classifieur, signature = None, majs = None):
+	if estElague(classifieur):
+		print("Erreur -> Un classifieur élagué ne peut pas être mis à jour.")
+		return None
+	journal = journalClassifieur(classifieur)
+	chemin_mail = os.path.abspath(chemin_mail)
+
+	try:
+		if signature is None:
+			st = os.stat(chemin_mail)
+			signature = (st.st_size, st.st_mtime_ns)
+		contenu = lireContenu(chemin_mail, lecteurClassifieur(classifieur))
+	except Exception as ex:
+		print(f"Erreur lors de la lecture de {chemin_mail} : {ex}")
+		return None
+
+	empreinte = hashlib.blake2b(contenu, digest_size=16).hexdigest()
+	classe = journal["empreintes"].get(empreinte)
+	maj = {"fichier": chemin_mail, "signature": signature, "empreinte": empreinte, "isSpam": isSpam, "ancien": classe, "indices": None}
+
+	if classe != isSpam:
+		x = vecteurMots(extraireMots(texteContenu(contenu, lecteurClassifieur(classifieur))), classifieur["dictionnaire"])
+		maj["indices"] = np.flatnonzero(x).tolist()
+
+	appliquerMaj(maj, classifieur)
+	if majs is not None:
+		majs.append(maj)
+
+	if classe == isSpam:
+		return "ignore"
+	return "nouveau" if classe is None else "inverse"
+
+
+'''
+	@brief	Met à jour un classifieur avec les mails d'un dossier en ne traitant que
+	les fichiers qui ne sont pas déjà dans le journal d'ingestion. Un fichier dont la
+	taille et la date de modification n'ont pas changé n'est pas relu.
+
+	@param dossier : Dossier des mails.
+	@param isSpam : Classe des mails du dossier.
+	@param classifieur : Classifieur à mettre à jour.
+	@param majs : Liste à laquelle ajouter les mises à jour appliquées (voir appliquerMaj).
+
+	@return Dictionnaire du nombre de mails par résultat ("nouveau", "inverse", "ignore"),
+	None si le classifieur est élagué.
+'''
+def majDossierClassifieur(dossier, isSpam, classifieur, majs = None):
+	if estElague(classifieur):
+		print("Erreur -> Un classifieur élagué ne peut pas être mis à jour.")
+		return None
+	journal = journalClassifieur(classifieur)
+	bilan = {"nouveau": 0, "inverse": 0, "ignore": 0}
+
+	with os.scandir(dossier) as entrees:
+		for entree in entrees:
+			if not entree.is_file(): # éviter les sous-dossiers
+				continue
+
+			st = entree.stat()
+			signature = (st.st_size, st.st_mtime_ns)
+			chemin = os.path.abspath(entree.path)
+			connu = journal["fichiers"].get(chemin)
+
+			# Fichier inchangé et déjà appris avec la même classe : rien à relire
+			if connu is not None and connu[0] == signature and journal["empreintes"].get(connu[1]) == isSpam:
+				bilan["ignore"] += 1
+				continue
+
+			resultat = apprendreMail(chemin, isSpam, classifieur, signature, majs)
+			if resultat is not None:
+				bilan[resultat] += 1
+
+	return bilan
 
-	total = classifieur["mHam"] + classifieur["mSpam"]
-	classifieur["PSpam"] = classifieur["mSpam"] / total
-	classifieur["Pham"] = classifieur["mHam"] / total
 
-	print("Le classifieur a été mis à jour avec le nouveau mail : ", chemin_mail)
\ No newline at end of file
+# ======================================================================================
+# 								CATALOGUE DES MODÈLES
+# ======================================================================================
+#
+# Le fichier catalogue.json du dossier de sauvegarde décrit chaque modèle (taille du
+# vocabulaire, mSpam, mHam, epsilon, seuil, dernière erreur de test...) : lister, filtrer
+# et choisir parmi les modèles ne demande pas de les charger. Le catalogue est tenu à jour
+# par sauvegarderClassifieur ; un modèle ajouté, modifié ou supprimé autrement est repéré
+# par sa taille et sa date de modification au moment de la lecture du catalogue.
+
+CATALOGUE = "catalogue.json"
+
+
+'''
+	@brief	Empreinte des paramètres d'un classifieur : une erreur de test n'est conservée
+	dans le catalogue que tant que les paramètres testés n'ont pas changé.
+'''
+def empreinteParametres(classifieur):
+	empreinte = hashlib.blake2b(digest_size=16)
+	for cle in ("bspam", "bham"):
+		if cle in classifieur:
+			empreinte.update(np.asarray(classifieur[cle], dtype=float).tobytes())
+	empreinte.update(repr(tuple(classifieur.get(cle) for cle in ("mSpam", "mHam", "seuil", "biais_elague"))).encode())
+	return empreinte.hexdigest()
+
+
+'''
+	@brief	Métadonnées d'un classifieur sauvegardé dans chemin_fichier.
+'''
+def metadonneesClassifieur(classifieur, chemin_fichier):
+	st = os.stat(chemin_fichier)
+	if "dictionnaire" in classifieur:
+		mots = len(classifieur["dictionnaire"])
+	else: # Sauvegarde lue telle quelle : le vocabulaire est dans un fichier à part
+		mots = classifieur.get("vocabulaire", {}).get("mots", 0)
+	return {
+		"mots": mots,
+		"mSpam": int(classifieur.get("mSpam", 0)),
+		"mHam": int(classifieur.get("mHam", 0)),
+		"epsilon": epsilon,
+		"seuil": float(classifieur.get("seuil", 0)),
+		"elague": "biais_elague" in classifieur,
+		"octets": st.st_size,
+		"modifie": st.st_mtime_ns,
+		"sauvegarde": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(st.st_mtime)),
+		"empreinte": empreinteParametres(classifieur),
+		"erreur_test": None,
+	}
+
+
+'''
+	@brief	Écrit le catalogue d'un dossier (fichier temporaire puis remplacement).
+'''
+def ecrireCatalogue(catalogue, dossier = "saves"):
+	chemin = os.path.join(dossier, CATALOGUE)
+	with open(chemin + ".tmp", "w", encoding="utf-8") as f:
+		json.dump(catalogue, f, indent=1, sort_keys=True)
+	os.replace(chemin + ".tmp", chemin)
+
+
+'''
+	@brief	Lit le fichier catalogue tel quel (vide s'il n'existe pas ou est illisible).
+'''
+def lireFichierCatalogue(dossier = "saves"):
+	try:
+		with open(os.path.join(dossier, CATALOGUE), encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+
+'''
+	@brief	Lit le catalogue d'un dossier en le remettant en accord avec les fichiers présents :
+	les modèles disparus sont retirés, les modèles nouveaux ou modifiés hors de
+	sauvegarderClassifieur sont chargés une fois pour être décrits.
+
+	@return Dictionnaire {nom: métadonnées}.
+'''
+def lireCatalogue(dossier = "saves"):
+	if not os.path.isdir(dossier):
+		return {}
+
+	catalogue = lireFichierCatalogue(dossier)
+	modifie = False
+	presents = {}
+	with os.scandir(dossier) as entrees:
+		for entree in entrees:
+			if entree.is_file() and entree.name.endswith(".pkl"):
+				presents[entree.name] = entree.stat()
+
+	for nom in [nom for nom in catalogue if nom not in presents]:
+		del catalogue[nom]
+		modifie = True
+
+	for nom, st in presents.items():
+		meta = catalogue.get(nom)
+		if meta is not None and meta["octets"] == st.st_size and meta["modifie"] == st.st_mtime_ns:
+			continue
+		try:
+			with open(os.path.join(dossier, nom), "rb") as f:
+				catalogue[nom] = metadonneesClassifieur(pickle.load(f), os.path.join(dossier, nom))
+		except Exception as ex:
+			print(f"Erreur lors de la lecture de {nom} : {ex}")
+			catalogue.pop(nom, None)
+			continue
+		modifie = True
+
+	if modifie:
+		try:
+			ecrireCatalogue(catalogue, dossier)
+		except OSError as ex:
+			print(f"Le catalogue n'a pas pu être enregistré : {ex}")
+	return catalogue
+
+
+'''
+	@brief	Inscrit (ou met à jour) un classifieur qui vient d'être sauvegardé. La dernière
+	erreur de test est gardée si les paramètres n'ont pas changé.
+'''
+def inscrireCatalogue(classifieur, dossier = "saves", nom = "classifieur.pkl"):
+	try:
+		catalogue = lireFichierCatalogue(dossier)
+		meta = metadonneesClassifieur(classifieur, os.path.join(dossier, nom))
+		ancien = catalogue.get(nom)
+		if ancien is not None and ancien.get("empreinte") == meta["empreinte"]:
+			meta["erreur_test"] = ancien.get("erreur_test")
+		catalogue[nom] = meta
+		ecrireCatalogue(catalogue, dossier)
+	except OSError as ex:
+		print(f"Le catalogue n'a pas pu être mis à jour : {ex}")
+
+
+'''
+	@brief	Retire un classifieur du catalogue (après suppression de son fichier).
+'''
+def retirerDuCatalogue(dossier = "saves", nom = "classifieur.pkl"):
+	catalogue = lireFichierCatalogue(dossier)
+	if catalogue.pop(nom, None) is not None:
+		ecrireCatalogue(catalogue, dossier)
+
+
+'''
+	@brief	Note dans le catalogue l'erreur de test d'un classifieur sauvegardé, si ses
+	paramètres sont bien ceux de la sauvegarde et que son journal de mises à jour est vide
+	(sinon le modèle testé n'est pas celui que décrit le catalogue).
+
+	@param erreur : Erreur de test globale (en %).
+	@param nom : Nom de la sauvegarde (classifieur["nom"] par défaut).
+
+	@return 1 si l'erreur a été notée, None sinon.
+'''
+def noterErreurTest(classifieur, erreur, dossier = "saves", nom = None):
+	nom = nom or classifieur.get("nom")
+	if lireJournal(dossier, nom):
+		return None
+	catalogue = lireFichierCatalogue(dossier)
+	meta = catalogue.get(nom)
+	if meta is None or meta["empreinte"] != empreinteParametres(classifieur):
+		return None
+
+	meta["erreur_test"] = float(erreur)
+	ecrireCatalogue(catalogue, dossier)
+	return 1
+
+
+'''
+	@brief	Filtre et trie les modèles d'un catalogue.
+
+	@param motif : Sous-chaîne du nom.
+	@param mots_min : Taille minimale du vocabulaire.
+	@param erreur_max : Erreur de test maximale (en %) ; les modèles jamais testés sont exclus.
+
+	@return Liste triée des noms retenus.
+'''
+def filtrerCatalogue(catalogue, motif = "", mots_min = 0, erreur_max = None):
+	return sorted(
+		nom for nom, meta in catalogue.items()
+		if motif in nom and meta["mots"] >= mots_min
+		and (erreur_max is None or (meta["erreur_test"] is not None and meta["erreur_test"] <= erreur_max))
+	)
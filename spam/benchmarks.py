@@ -0,0 +1,490 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 									BENCHMARKS
+# ======================================================================================
+#
+# Usage : python benchmarks.py <nom> [--classifieur test.pkl]
+
+
+'''
+	@brief	Compare la somme creuse des poids des mots présents (biais + poids[indices].sum())
+	et la prédiction avec arrêt anticipé sur la base de test : décisions, nombre de termes
+	additionnés et temps de calcul (préparation du modèle comprise).
+'''
+def bench_arret_anticipe(classifieur, base = "basetest"):
+	mails = mails_etiquetes(base)
+	dictionnaire = classifieur["dictionnaire"]
+	biais, poids = poidsClassifieur(classifieur)
+	seuil = classifieur.get("seuil", 0)
+	indices = [np.flatnonzero(lireMail(chemin, dictionnaire, lecteurClassifieur(classifieur))) for chemin, _ in mails]
+
+	debut = time.perf_counter()
+	creuses = [biais + poids[i].sum() > seuil for i in indices]
+	duree_creuse = time.perf_counter() - debut
+
+	debut = time.perf_counter()
+	ordre = ordreAnticipe(poids)
+	duree_preparation = time.perf_counter() - debut
+
+	debut = time.perf_counter()
+	anticipes = [predictionAnticipee(i, biais, ordre, seuil) for i in indices]
+	duree_anticipee = time.perf_counter() - debut
+
+	differences = sum(a[0] != c for a, c in zip(anticipes, creuses))
+	nb_approx = sum(a[3] for a in anticipes)
+	termes_presents = sum(len(i) for i in indices)
+	termes_evalues = sum(a[4] for a in anticipes)
+
+	print(f"Mails : {len(mails)}  Vocabulaire : {len(dictionnaire)}")
+	print(f"Décisions différentes de la somme creuse : {differences}")
+	print(f"Mails arrêtés avant la fin : {nb_approx} ({100 * nb_approx / len(mails):.1f} %)")
+	print(f"Termes évalués : {termes_evalues} / {termes_presents} mots présents ({100 * (1 - termes_evalues / max(termes_presents, 1)):.1f} % économisés)")
+	print(f"Temps somme creuse : {1e6 * duree_creuse / len(mails):.1f} µs/mail")
+	print(f"Temps arrêt anticipé : {1e6 * duree_anticipee / len(mails):.1f} µs/mail (+ {1e3 * duree_preparation:.2f} ms de préparation par modèle)")
+
+
+'''
+	@brief	Nourrit une fenêtre glissante avec les mails d'une base répartis sur deux fois la
+	longueur de la fenêtre, puis compare ses comptes à ceux recalculés à partir des seuls
+	mails encore dans la fenêtre, avant et après une sauvegarde. Sort en erreur en cas
+	d'écart.
+'''
+def bench_fenetre(classifieur, base = "baseapp", nb_epoques = 10):
+	from fenetre import ClassifieurFenetre, chargerFenetre, sauvegarderFenetre
+
+	dictionnaire = classifieur["dictionnaire"]
+	lecteur = lecteurClassifieur(classifieur)
+	mails = mails_etiquetes(base)
+	random.Random(0).shuffle(mails)
+	vecteurs = [lireMail(chemin, dictionnaire, lecteur) for chemin, _ in mails]
+	epoques = [2 * nb_epoques * k // len(mails) for k in range(len(mails))] # Une époque dure 1 seconde
+
+	debut = time.perf_counter()
+	fenetre = ClassifieurFenetre(dictionnaire, nb_epoques, 1, 0, lecteur)
+	for x, (_, isSpam), epoque in zip(vecteurs, mails, epoques):
+		fenetre.ajouter(x, isSpam, epoque)
+	duree = time.perf_counter() - debut
+
+	# Comptes recalculés : mails des nb_epoques dernières époques
+	debut = time.perf_counter()
+	vivants = [k for k, epoque in enumerate(epoques) if epoque > epoques[-1] - nb_epoques]
+	nspam = sum((vecteurs[k] for k in vivants if mails[k][1]), np.zeros(len(dictionnaire)))
+	nham = sum((vecteurs[k] for k in vivants if not mails[k][1]), np.zeros(len(dictionnaire)))
+	mSpam = sum(mails[k][1] for k in vivants)
+	duree_recalcul = time.perf_counter() - debut
+
+	with tempfile.TemporaryDirectory() as dossier:
+		sauvegarderFenetre(fenetre, dossier, "bench.fen")
+		rechargee = chargerFenetre(dossier, "bench.fen")
+
+	ecarts = 0
+	for f in (fenetre, rechargee):
+		ecarts += not (np.array_equal(f.nspam, nspam) and np.array_equal(f.nham, nham)
+			and f.mSpam == mSpam and f.mHam == len(vivants) - mSpam and f.verifier())
+	ecarts += rechargee.epoque != fenetre.epoque
+
+	print(f"Mails : {len(mails)} sur {2 * nb_epoques} époques, fenêtre de {nb_epoques} époques : {fenetre.mSpam} SPAM, {fenetre.mHam} HAM")
+	print(f"Temps d'ajout incrémental : {1e6 * duree / len(mails):.1f} µs/mail")
+	print(f"Temps de recalcul des comptes de la fenêtre : {1e3 * duree_recalcul:.1f} ms")
+	print(f"Écarts avec les comptes recalculés (avant / après sauvegarde) : {ecarts}")
+	if ecarts:
+		sys.exit(1)
+
+
+'''
+	@brief	Mesure le temps de démarrage à froid (lancement de l'interpréteur compris) du point
+	d'entrée léger score.py comparé au simple import de interface.py, avec le modèle du
+	classifieur puis avec un modèle synthétique de grand vocabulaire : le chargement ne doit
+	pas dépendre du nombre de mots.
+'''
+def bench_demarrage(classifieur, base = "basetest", repetitions = 10, grand_vocabulaire = 2_000_000):
+	import score
+
+	mail = mails_etiquetes(base)[0][0]
+	with tempfile.TemporaryDirectory() as dossier:
+		modele = os.path.join(dossier, "modele.mdl")
+		score.ecrire_modele(classifieur, modele)
+
+		# Mots du classifieur suivis d'autant de mots synthétiques que nécessaire
+		mots = list(classifieur["dictionnaire"])
+		mots += [f"mot{i:x}" for i in range(grand_vocabulaire - len(mots))]
+		generateur = np.random.default_rng(0)
+		grand = classifieurDepuisComptes(mots, generateur.integers(0, 50, len(mots)), 50, generateur.integers(0, 50, len(mots)), 50)
+		modele_grand = os.path.join(dossier, "grand.mdl")
+		score.ecrire_modele(grand, modele_grand)
+
+		commandes = {
+			"python (vide)": [sys.executable, "-c", "pass"],
+			"import interface": [sys.executable, "-c", "import interface"],
+			"score.py (1 mail)": [sys.executable, "score.py", modele, mail],
+			f"score.py ({len(mots)} mots)": [sys.executable, "score.py", modele_grand, mail],
+		}
+		for libelle, commande in commandes.items():
+			durees = []
+			for _ in range(repetitions):
+				debut = time.perf_counter()
+				subprocess.run(commande, check=True, stdout=subprocess.DEVNULL)
+				durees.append(time.perf_counter() - debut)
+			print(f"{libelle:>25} : médiane {1000 * sorted(durees)[len(durees) // 2]:.1f} ms")
+		print(f"Taille des modèles : {os.path.getsize(modele) / 1024:.1f} Kio et {os.path.getsize(modele_grand) / 2**20:.1f} Mio")
+
+
+'''
+	@brief	Compare les lecteurs "texte" et "mime" de lireMail : latence et pic mémoire par mail sur des mails
+	synthétiques (dont des pièces jointes volumineuses) et erreur de test sur la base.
+'''
+def bench_lecture_mime(classifieur, base = "basetest"):
+	import tracemalloc
+	from email.mime.application import MIMEApplication
+	from email.mime.multipart import MIMEMultipart
+	from email.mime.text import MIMEText
+
+	dictionnaire = classifieur["dictionnaire"]
+	texte = "Dear friend, claim your free money offer now and click here to unsubscribe. " * 20
+
+	def mail_avec(pieces):
+		message = MIMEMultipart()
+		message["Subject"] = "Free money offer"
+		message.attach(MIMEText(texte, "plain"))
+		for piece in pieces:
+			message.attach(piece)
+		return message.as_bytes()
+
+	with tempfile.TemporaryDirectory() as dossier:
+		cas = {
+			"mail texte": mail_avec([]),
+			"pièce jointe 20 Mo": mail_avec([MIMEApplication(os.urandom(20 * 1024 * 1024), Name="archive.zip")]),
+			"HTML 5 Mo": mail_avec([MIMEText("<html><body><p>" + "<b>money</b> <i>offer</i> " * 250000 + "</p></body></html>", "html")]),
+			"texte base64 5 Mo": mail_avec([MIMEText(texte * 300, "plain", "utf-8")]),
+		}
+		for libelle, contenu in cas.items():
+			chemin = os.path.join(dossier, "mail.eml")
+			with open(chemin, "wb") as f:
+				f.write(contenu)
+
+			for lecteur in LECTEURS:
+				tracemalloc.start()
+				debut = time.perf_counter()
+				lireMail(chemin, dictionnaire, lecteur)
+				duree = time.perf_counter() - debut
+				pic = tracemalloc.get_traced_memory()[1]
+				tracemalloc.stop()
+				print(f"{libelle:>20} {lecteur:>5} : {1000 * duree:8.1f} ms  pic mémoire {pic / 1024 / 1024:6.1f} Mo")
+
+	# Erreur de test avec chacun des lecteurs, le modèle étant appris avec le même lecteur
+	mails = mails_etiquetes(base)
+	for lecteur in LECTEURS:
+		modele = creerClassifieur("baseapp/spam", "baseapp/ham", dictionnaire, lecteur=lecteur)
+		debut = time.perf_counter()
+		erreurs = sum(
+			prediction(lireMail(chemin, dictionnaire, lecteurClassifieur(modele)), modele["Pspam"], modele["Pham"], modele["bspam"], modele["bham"])[0] != isSpam
+			for chemin, isSpam in mails
+		)
+		duree = time.perf_counter() - debut
+		print(f"{lecteur:>5} : erreur de test {100 * erreurs / len(mails):.2f} %  {1000 * duree / len(mails):.2f} ms/mail")
+
+
+'''
+	@brief	Test de charge du classifieur concurrent : plusieurs threads prédisent pendant qu'un
+	écrivain applique des lots. Chaque verdict est recalculé avec l'instantané dont il se
+	réclame et doit lui correspondre exactement ; le benchmark sort en erreur sinon.
+'''
+def bench_concurrence(classifieur, base = "basetest", nb_lecteurs = 4, nb_lots = 50, taille_lot = 20):
+	from classifieur_concurrent import ClassifieurConcurrent
+
+	dictionnaire = classifieur["dictionnaire"]
+	tests = [lireMail(chemin, dictionnaire) for chemin, _ in mails_etiquetes(base)]
+	apprentissage = [(lireMail(chemin, dictionnaire), isSpam) for chemin, isSpam in mails_etiquetes("baseapp")[::3]]
+
+	concurrent = ClassifieurConcurrent(classifieur)
+	instantanes = {0: concurrent.instantane()}
+	verdicts = [[] for _ in range(nb_lecteurs)]
+	fin = threading.Event()
+
+	def lecteur(resultats):
+		i = 0
+		while not fin.is_set():
+			k = i % len(tests)
+			resultats.append((k,) + concurrent.predire(tests[k]))
+			i += 7
+
+	def ecrivain():
+		for n in range(nb_lots):
+			lot = [apprentissage[(n * taille_lot + j) % len(apprentissage)] for j in range(taille_lot)]
+			instantane = concurrent.appliquerLot(lot)
+			instantanes[instantane.generation] = instantane
+			time.sleep(0.002) # Laisse les lecteurs s'intercaler entre les lots
+		fin.set()
+
+	threads = [threading.Thread(target=lecteur, args=(r,)) for r in verdicts] + [threading.Thread(target=ecrivain)]
+	debut = time.perf_counter()
+	for thread in threads:
+		thread.start()
+	for thread in threads:
+		thread.join()
+	duree = time.perf_counter() - debut
+
+	incoherents = 0
+	total = 0
+	generations = set()
+	for resultats in verdicts:
+		for k, isSpam, Pspam_x, _, generation in resultats:
+			s = instantanes[generation]
+			attendu = prediction(tests[k], s.Pspam, s.Pham, s.bspam, s.bham, s.seuil, s.biais_elague or 0)
+			incoherents += (attendu[0] != isSpam) or (attendu[1] != Pspam_x)
+			generations.add(generation)
+			total += 1
+
+	print(f"{total} prédictions par {nb_lecteurs} threads pendant {nb_lots} lots de {taille_lot} mails ({duree:.2f} s)")
+	print(f"Instantanés observés par les lecteurs : {len(generations)} / {nb_lots + 1}")
+	print(f"Verdicts incohérents avec leur instantané : {incoherents}")
+	partage = all(s.dictionnaire is instantanes[0].dictionnaire for s in instantanes.values())
+	print(f"Dictionnaire partagé par tous les instantanés : {'oui' if partage else 'non'}")
+	final = concurrent.instantane()
+	print(f"Instantané final : génération {final.generation}, mSpam {final.mSpam}, mHam {final.mHam}")
+	if incoherents or not partage:
+		sys.exit(1)
+
+
+'''
+	@brief	Apprentissage avec et sans déduplication sur un corpus synthétique dominé par des
+	campagnes (chaque SPAM copié plusieurs fois avec de petites variations) : temps, nombre
+	de groupes trouvés et erreur de test.
+'''
+def bench_deduplication(classifieur, base = "basetest", nb_campagnes = 100, copies = 10):
+	import random
+	from deduplication import creerClassifieurDedup, grappesDossier
+
+	dictionnaire = classifieur["dictionnaire"]
+	generateur = random.Random(0)
+	mots = [m for m in dictionnaire if m.isalpha()]
+	mails = mails_etiquetes(base)
+
+	with tempfile.TemporaryDirectory() as dossier:
+		dossier_spams = os.path.join(dossier, "spam")
+		os.makedirs(dossier_spams)
+		for i, f in enumerate(sorted(os.listdir("baseapp/spam"))[:nb_campagnes]):
+			with open(os.path.join("baseapp/spam", f), encoding="utf-8", errors="ignore") as source:
+				texte = source.read()
+			for c in range(copies):
+				with open(os.path.join(dossier_spams, f"{i}_{c}.txt"), "w", encoding="utf-8") as copie:
+					copie.write(texte + "\n" + " ".join(generateur.sample(mots, 3)) + f" ref{c}\n")
+
+		_, _, representants = grappesDossier(dossier_spams)
+		print(f"{nb_campagnes * copies} SPAM de campagne -> {len(set(representants))} groupes (attendu {nb_campagnes})")
+
+		for libelle, creation in (
+			("sans déduplication", lambda: creerClassifieur(dossier_spams, "baseapp/ham", dictionnaire)),
+			("dédupliqué (supprimer)", lambda: creerClassifieurDedup(dossier_spams, "baseapp/ham", dictionnaire, "supprimer")),
+			("dédupliqué (pondérer)", lambda: creerClassifieurDedup(dossier_spams, "baseapp/ham", dictionnaire, "ponderer")),
+		):
+			debut = time.perf_counter()
+			modele = creation()
+			duree = time.perf_counter() - debut
+			erreurs = sum(
+				prediction(lireMail(chemin, dictionnaire), modele["Pspam"], modele["Pham"], modele["bspam"], modele["bham"])[0] != isSpam
+				for chemin, isSpam in mails
+			)
+			print(f"{libelle:>24} : apprentissage {duree:.2f} s  mSpam {modele['mSpam']}  erreur de test {100 * erreurs / len(mails):.2f} %")
+
+
+'''
+	@brief	Débit du score en flux (scorerFlux) selon la taille des lots, comparé à la
+	prédiction mail par mail.
+'''
+def bench_flux(classifieur, base = "basetest", tailles = (1, 16, 256)):
+	import io
+	import json
+	from flux import lireNdjson, scorerFlux
+
+	dictionnaire = classifieur["dictionnaire"]
+	textes = []
+	for chemin, _ in mails_etiquetes(base):
+		with open(chemin, encoding="utf-8", errors="ignore") as f:
+			textes.append(f.read())
+	entree = "".join(json.dumps({"id": i, "texte": texte}) + "\n" for i, texte in enumerate(textes))
+
+	debut = time.perf_counter()
+	for texte in textes:
+		prediction(vecteurMots(extraireMots(texte.lower()), dictionnaire), classifieur["Pspam"], classifieur["Pham"], classifieur["bspam"], classifieur["bham"])
+	duree = time.perf_counter() - debut
+	print(f"{'mail par mail':>18} : {len(textes) / duree:8.0f} mails/s")
+
+	for taille in tailles:
+		sortie = io.StringIO()
+		debut = time.perf_counter()
+		scorerFlux(lireNdjson(io.StringIO(entree)), classifieur, sortie, taille)
+		duree = time.perf_counter() - debut
+		print(f"{f'flux (lots de {taille})':>18} : {len(textes) / duree:8.0f} mails/s")
+
+
+'''
+	@brief	Vocabulaire compact contre dict et liste sur un dictionnaire synthétique de
+	nb_mots mots : mémoire, temps de chargement et recherche des mots de mails synthétiques.
+'''
+def bench_vocabulaire(classifieur, nb_mots = 1_000_000, nb_mails = 1000, mots_par_mail = 200):
+	import pickle
+	import random
+	import tracemalloc
+	from vocabulaire import chargerVocabulaire, creerVocabulaire, ecrireVocabulaire
+
+	generateur = random.Random(0)
+	lettres = "abcdefghijklmnopqrstuvwxyz"
+	tracemalloc.start()
+	liste = list(dict.fromkeys("".join(generateur.choices(lettres, k=generateur.randint(3, 14))) for _ in range(nb_mots)))
+	memoire_liste = tracemalloc.get_traced_memory()[0]
+	index = {mot: i for i, mot in enumerate(liste)}
+	memoire_dict = tracemalloc.get_traced_memory()[0] - memoire_liste
+	tracemalloc.stop()
+
+	# Mails : moitié de mots connus, moitié de mots inconnus
+	mails = [
+		generateur.sample(liste, mots_par_mail // 2) + ["".join(generateur.choices(lettres, k=generateur.randint(3, 14))) for _ in range(mots_par_mail // 2)]
+		for _ in range(nb_mails)
+	]
+
+	with tempfile.TemporaryDirectory() as dossier:
+		chemin_liste = os.path.join(dossier, "liste.pkl")
+		chemin_vocabulaire = os.path.join(dossier, "vocabulaire.voc")
+		with open(chemin_liste, "wb") as f:
+			pickle.dump(liste, f)
+		ecrireVocabulaire(creerVocabulaire(liste), chemin_vocabulaire)
+
+		debut = time.perf_counter()
+		with open(chemin_liste, "rb") as f:
+			pickle.load(f)
+		chargement_liste = time.perf_counter() - debut
+
+		debut = time.perf_counter()
+		vocabulaire = chargerVocabulaire(chemin_vocabulaire)
+		chargement_vocabulaire = time.perf_counter() - debut
+
+		print(f"{len(liste)} mots, {nb_mails} mails de {mots_par_mail} mots")
+		print(f"{'liste':>12} : mémoire {memoire_liste / 1024 / 1024:8.1f} Mo  chargement {1000 * chargement_liste:8.1f} ms")
+		print(f"{'dict':>12} : mémoire {(memoire_liste + memoire_dict) / 1024 / 1024:8.1f} Mo  (liste comprise)")
+		print(f"{'vocabulaire':>12} : mémoire {vocabulaire.taille() / 1024 / 1024:8.1f} Mo  chargement {1000 * chargement_vocabulaire:8.1f} ms (mmap)")
+
+		debut = time.perf_counter()
+		for mots in mails:
+			[index[mot] for mot in set(mots) if mot in index]
+		print(f"{'dict':>12} : {1e6 * (time.perf_counter() - debut) / nb_mails:10.1f} µs/mail")
+
+		debut = time.perf_counter()
+		for mots in mails:
+			vocabulaire.indices(mots)
+		print(f"{'vocabulaire':>12} : {1e6 * (time.perf_counter() - debut) / nb_mails:10.1f} µs/mail")
+
+		debut = time.perf_counter()
+		for mots in mails[:3]: # list.index parcourt toute la liste pour chaque mot inconnu
+			vecteurMots(mots, liste)
+		print(f"{'liste':>12} : {1e6 * (time.perf_counter() - debut) / 3:10.1f} µs/mail")
+
+
+'''
+	@brief	Rejoue un flux synthétique dominé par des campagnes (quelques corps de SPAM répétés,
+	à la casse et aux espaces près) avec et sans cache de verdicts : taux de succès, débit,
+	et invalidation par une mise à jour du modèle au milieu du flux.
+'''
+def bench_cache(classifieur, base = "basetest", nb_campagnes = 50, nb_copies = 4000, max_entrees = 500):
+	import random
+	from cache_verdicts import CacheVerdicts
+
+	generateur = random.Random(0)
+
+	def lire(chemin):
+		with open(chemin, encoding="utf-8", errors="ignore") as f:
+			return f.read()
+
+	campagnes = [lire(os.path.join("baseapp/spam", f)) for f in sorted(os.listdir("baseapp/spam"))[:nb_campagnes]]
+	uniques = [lire(chemin) for chemin, _ in mails_etiquetes(base)]
+	flux = [generateur.choice(campagnes).replace(" ", "  " if generateur.random() < 0.5 else " ") for _ in range(nb_copies)]
+	flux += [texte.upper() if generateur.random() < 0.1 else texte for texte in uniques]
+	generateur.shuffle(flux)
+
+	mise_a_jour = lireMail(mails_etiquetes("baseapp")[0][0], classifieur["dictionnaire"])
+
+	def rejouer(classer):
+		modele = dict(classifieur)
+		verdicts = []
+		debut = time.perf_counter()
+		for i, texte in enumerate(flux):
+			if i == len(flux) // 2:
+				majVecteur(mise_a_jour, True, modele) # Mise à jour du modèle en cours de flux
+			verdicts.append(classer(texte, modele)[0])
+		return verdicts, time.perf_counter() - debut
+
+	def sans_cache(texte, modele):
+		x = vecteurMots(extraireMots(texte.lower()), modele["dictionnaire"])
+		return prediction(x, modele["Pspam"], modele["Pham"], modele["bspam"], modele["bham"], modele.get("seuil", 0), modele.get("biais_elague", 0))
+
+	cache = CacheVerdicts(max_entrees=max_entrees)
+	attendus, duree_sans = rejouer(sans_cache)
+	verdicts, duree_avec = rejouer(cache.classer)
+
+	stats = cache.statistiques()
+	print(f"Flux de {len(flux)} mails : {nb_copies} copies de {nb_campagnes} campagnes, {len(uniques)} mails uniques")
+	print(f"{'sans cache':>12} : {len(flux) / duree_sans:8.0f} mails/s")
+	print(f"{'avec cache':>12} : {len(flux) / duree_avec:8.0f} mails/s  (x{duree_sans / duree_avec:.1f})")
+	print(f"Succès {stats['succes']}  échecs {stats['echecs']}  taux {100 * stats['taux_succes']:.1f} %  évictions {stats['evictions']}  invalidations {stats['invalidations']}")
+	print(f"Cache : {stats['entrees']} entrées, {stats['octets'] / 1024:.1f} Kio")
+	print(f"Verdicts différents de ceux sans cache : {sum(a != b for a, b in zip(attendus, verdicts))}")
+
+
+'''
+	@brief	Cascade petit modèle / modèle complet : le modèle complet est réappris sur les deux
+	premiers tiers de baseapp et la bande est réglée sur le dernier tiers, jamais appris ;
+	taux d'escalade, accord et accélération sont mesurés sur la base de test.
+'''
+def bench_cascade(classifieur, base = "basetest"):
+	import shutil
+	from cascade import creerCascade, rapportCascade
+
+	with tempfile.TemporaryDirectory() as validation:
+		fichiers = {}
+		for label in ("spam", "ham"):
+			noms = sorted(os.listdir(os.path.join("baseapp", label)))
+			coupe = 2 * len(noms) // 3
+			fichiers[label] = noms[:coupe]
+			os.makedirs(os.path.join(validation, label))
+			for nom in noms[coupe:]:
+				shutil.copy(os.path.join("baseapp", label, nom), os.path.join(validation, label, nom))
+
+		modele = creerClassifieur("baseapp/spam", "baseapp/ham", classifieur["dictionnaire"], fichiers["spam"], fichiers["ham"], lecteurClassifieur(classifieur))
+		for nb_mots in (50, 100, 200):
+			rapportCascade(creerCascade(modele, validation, nb_mots), base)
+			print()
+
+
+BENCHMARKS = {
+	"arret_anticipe": bench_arret_anticipe,
+	"cache": bench_cache,
+	"cascade": bench_cascade,
+	"concurrence": bench_concurrence,
+	"deduplication": bench_deduplication,
+	"demarrage": bench_demarrage,
+	"fenetre": bench_fenetre,
+	"flux": bench_flux,
+	"lecture_mime": bench_lecture_mime,
+	"vocabulaire": bench_vocabulaire,
+}
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Benchmarks du filtre anti-spam.")
+	parser.add_argument("nom", choices=sorted(BENCHMARKS), help="Benchmark à lancer.")
+	parser.add_argument("--classifieur", default="test.pkl", help="Classifieur de saves/ à utiliser.")
+	args = parser.parse_args()
+
+	classifieur = chargerClassifieur(nom=args.classifieur)
+	if classifieur is not None:
+		BENCHMARKS[args.nom](classifieur)
@@ -0,0 +1,156 @@
+import sys
+from collections import OrderedDict
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 						CACHE DES VERDICTS PAR EMPREINTE DU CONTENU
+# ======================================================================================
+#
+# Une campagne de SPAM envoie des milliers de fois le même corps de mail. Le cache garde le
+# verdict de chaque corps déjà classé, repéré par une empreinte du texte normalisé (en
+# minuscules, espaces regroupés), et évite ainsi la vectorisation et la prédiction des
+# copies (pour un modèle appris avec le lecteur MIME, l'empreinte porte sur le mail brut,
+# dont la structure compte). Il est borné en nombre d'entrées et en octets, et évince l'entrée la moins
+# récemment utilisée (LRU).
+#
+# Les verdicts ne valent que pour un état du modèle : le cache note la génération du
+# classifieur (renouvelée à chaque mise à jour ou rechargement, voir generationSuivante)
+# et son seuil, et se vide dès que l'un d'eux change.
+
+MAX_ENTREES = 100_000
+MAX_OCTETS = 32 * 1024 * 1024
+
+
+'''
+	@brief	Empreinte du corps normalisé d'un mail (du mail brut pour le lecteur "mime").
+
+	@param texte : Contenu du mail (chaîne ou octets).
+	@param lecteur : Lecteur du modèle (voir LECTEURS).
+'''
+def empreinteTexte(texte, lecteur = "texte"):
+	if lecteur == "mime":
+		return hashlib.blake2b(texte if isinstance(texte, bytes) else texte.encode("utf-8", errors="ignore"), digest_size=16).digest()
+	if isinstance(texte, bytes):
+		texte = texte.decode("utf-8", errors="ignore")
+	return hashlib.blake2b(" ".join(texte.lower().split()).encode("utf-8", errors="ignore"), digest_size=16).digest()
+
+
+class CacheVerdicts:
+	'''
+		@brief	Cache LRU des verdicts (isSpam, Pspam_x, Pham_x) indexé par empreinte du
+		contenu, invalidé automatiquement quand le modèle change.
+	'''
+
+	def __init__(self, max_entrees = MAX_ENTREES, max_octets = MAX_OCTETS):
+		self.max_entrees = max_entrees
+		self.max_octets = max_octets
+		self.entrees = OrderedDict()
+		self.octets = 0
+		self.etat = None # (génération, seuil) du modèle des verdicts en cache
+
+		self.succes = 0
+		self.echecs = 0
+		self.evictions = 0
+		self.invalidations = 0
+
+	'''
+		@brief	Vide le cache (les statistiques sont conservées).
+	'''
+	def vider(self):
+		self.entrees.clear()
+		self.octets = 0
+
+	'''
+		@brief	Taille mémoire estimée d'une entrée (clé, verdict et maillon de l'OrderedDict).
+	'''
+	@staticmethod
+	def tailleEntree(cle, verdict):
+		return sys.getsizeof(cle) + sys.getsizeof(verdict) + sum(sys.getsizeof(v) for v in verdict) + 100
+
+	'''
+		@brief	Vérifie que les verdicts en cache correspondent à l'état courant du modèle,
+		et vide le cache sinon.
+	'''
+	def verifierModele(self, classifieur):
+		etat = (classifieur.setdefault("generation", generationSuivante()), classifieur.get("seuil", 0))
+		if etat != self.etat:
+			if self.entrees:
+				self.invalidations += 1
+			self.vider()
+			self.etat = etat
+
+	'''
+		@brief	Cherche le verdict d'une empreinte (voir empreinteTexte) et compte le succès
+		ou l'échec. Le modèle doit avoir été vérifié avant (voir verifierModele).
+
+		@return Le verdict, None s'il n'est pas en cache.
+	'''
+	def chercher(self, cle):
+		verdict = self.entrees.get(cle)
+		if verdict is None:
+			self.echecs += 1
+			return None
+		self.entrees.move_to_end(cle)
+		self.succes += 1
+		return verdict
+
+	'''
+		@brief	Range le verdict d'une empreinte, en évinçant les entrées les moins récemment
+		utilisées au-delà des bornes.
+	'''
+	def ranger(self, cle, verdict):
+		self.entrees[cle] = verdict
+		self.octets += self.tailleEntree(cle, verdict)
+		while len(self.entrees) > self.max_entrees or self.octets > self.max_octets:
+			ancienne, ancien = self.entrees.popitem(last=False)
+			self.octets -= self.tailleEntree(ancienne, ancien)
+			self.evictions += 1
+
+	'''
+		@brief	Classe le texte d'un mail (chaîne ou octets), en réutilisant le verdict d'un corps identique
+		déjà classé avec le même modèle.
+
+		@return (isSpam, Pspam_x, Pham_x) comme prediction.
+	'''
+	def classer(self, texte, classifieur):
+		self.verifierModele(classifieur)
+		lecteur = lecteurClassifieur(classifieur)
+		cle = empreinteTexte(texte, lecteur)
+
+		verdict = self.chercher(cle)
+		if verdict is not None:
+			return verdict
+
+		x = vecteurMots(extraireMots(texteContenu(texte, lecteur)), classifieur["dictionnaire"])
+		isSpam, Pspam_x, Pham_x = prediction(
+			x, classifieur["Pspam"], classifieur["Pham"], classifieur["bspam"], classifieur["bham"],
+			classifieur.get("seuil", 0), classifieur.get("biais_elague", 0)
+		)
+		verdict = (bool(isSpam), float(Pspam_x), float(Pham_x))
+		self.ranger(cle, verdict)
+		return verdict
+
+	'''
+		@brief	Lit un mail et le classe avec le cache.
+	'''
+	def classerFichier(self, chemin_mail, classifieur):
+		with open(chemin_mail, "rb") as f:
+			return self.classer(f.read(), classifieur)
+
+	'''
+		@brief	Statistiques du cache.
+
+		@return Dictionnaire {succes, echecs, taux_succes, entrees, octets, evictions, invalidations}.
+	'''
+	def statistiques(self):
+		total = self.succes + self.echecs
+		return {
+			"succes": self.succes,
+			"echecs": self.echecs,
+			"taux_succes": self.succes / total if total else 0,
+			"entrees": len(self.entrees),
+			"octets": self.octets,
+			"evictions": self.evictions,
+			"invalidations": self.invalidations,
+		}
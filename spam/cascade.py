@@ -0,0 +1,172 @@
+import argparse
+import sys
+import time
+
+from bayes_classifier import *
+from compaction import elaguerClassifieur
+
+# ======================================================================================
+# 					CASCADE : PETIT MODÈLE D'ABORD, MODÈLE COMPLET SI DOUTE
+# ======================================================================================
+#
+# La plupart des mails sont tranchés sans ambiguïté par quelques mots très marqués. La
+# cascade classe d'abord chaque mail avec un petit modèle (le classifieur élagué à ses
+# nb_mots mots les plus informatifs, voir compaction.py) et ne fait appel au modèle complet
+# que si le score du petit modèle tombe dans une bande d'incertitude autour de son seuil.
+#
+# La largeur de la bande (marge, en log-odds) est réglée sur une base de validation : c'est
+# la plus petite marge pour laquelle la cascade donne la même décision que le modèle
+# complet sur au moins accord_cible des mails. Cette base doit être tenue à l'écart de
+# l'apprentissage : sur des mails appris, les deux modèles sont trop sûrs d'eux et la
+# bande serait sous-estimée.
+
+NB_MOTS = 100
+ACCORD_CIBLE = 0.99
+
+
+'''
+	@brief	Paramètres de prédiction (dictionnaire, biais, poids, seuil) d'un étage.
+'''
+def etage(classifieur):
+	biais, poids = poidsClassifieur(classifieur)
+	return {"dictionnaire": classifieur["dictionnaire"], "biais": biais, "poids": poids, "seuil": classifieur.get("seuil", 0)}
+
+
+'''
+	@brief	Score log-odds d'une liste de mots par un étage.
+'''
+def scoreEtage(mots, etage):
+	return etage["biais"] + etage["poids"][vecteurMots(mots, etage["dictionnaire"])].sum()
+
+
+'''
+	@brief	Construit une cascade et règle sa bande d'incertitude.
+
+	@param classifieur : Modèle complet.
+	@param validation : Base de validation (sous-dossiers spam/ et ham/), sans mail appris
+	par le modèle.
+	@param nb_mots : Taille du vocabulaire du petit modèle.
+	@param accord_cible : Proportion visée de décisions identiques au modèle complet.
+	@param critere : Critère d'élagage du petit modèle (voir compaction.informativite).
+
+	@return La cascade {"petit", "complet", "marge", "accord_cible", "lecteur"}.
+'''
+def creerCascade(classifieur, validation, nb_mots = NB_MOTS, accord_cible = ACCORD_CIBLE, critere = "information"):
+	# Le journal d'ingestion donne les mails appris par le modèle
+	appris = classifieur.get("journal", {}).get("fichiers", {})
+	if any(os.path.abspath(chemin) in appris for chemin, _ in mails_etiquetes(validation)):
+		raise ValueError(f"La base de validation {validation} contient des mails appris par le modèle.")
+
+	cascade = {
+		"petit": etage(elaguerClassifieur(classifieur, nb_mots, critere)),
+		"complet": etage(classifieur),
+		"marge": 0,
+		"accord_cible": accord_cible,
+		"lecteur": lecteurClassifieur(classifieur), # Les deux étages lisent les mails comme le modèle complet
+	}
+	reglerCascade(cascade, validation, accord_cible)
+	return cascade
+
+
+'''
+	@brief	Règle la marge de la cascade sur une base de validation.
+
+	@return L'accord obtenu avec le modèle complet sur la base.
+'''
+def reglerCascade(cascade, base, accord_cible = ACCORD_CIBLE):
+	petit, complet = cascade["petit"], cascade["complet"]
+
+	distances = []	# Distance au seuil du petit modèle pour chaque mail
+	desaccords = []	# Distances des mails où le petit modèle se trompe par rapport au complet
+	for chemin, _ in mails_etiquetes(base):
+		mots = motsFichier(chemin, cascade["lecteur"])
+		score = scoreEtage(mots, petit)
+		distance = abs(score - petit["seuil"])
+		distances.append(distance)
+		if (score > petit["seuil"]) != (scoreEtage(mots, complet) > complet["seuil"]):
+			desaccords.append(distance)
+
+	# On peut laisser passer au plus `tolere` désaccords : la marge doit couvrir tous les autres
+	tolere = int((1 - accord_cible) * len(distances))
+	desaccords.sort(reverse=True)
+	cascade["marge"] = desaccords[tolere] if tolere < len(desaccords) else -1
+
+	accord = 1 - sum(d > cascade["marge"] for d in desaccords) / max(len(distances), 1)
+	escalade = sum(d <= cascade["marge"] for d in distances) / max(len(distances), 1)
+	print(f"Marge réglée sur {len(distances)} mails : {cascade['marge']:.3f}  accord {100 * accord:.2f} %  escalade {100 * escalade:.1f} %")
+	return accord
+
+
+'''
+	@brief	Lit un mail avec un lecteur de LECTEURS et renvoie ses mots (en lowercase).
+'''
+def motsFichier(chemin_mail, lecteur = "texte"):
+	try:
+		return extraireMots(lireTexte(chemin_mail, lecteur))
+	except Exception as ex:
+		print(f"Erreur lors de la lecture de {chemin_mail} : {ex}")
+		return []
+
+
+'''
+	@brief	Classe les mots d'un mail avec la cascade.
+
+	@return (isSpam, Pspam_x, escalade) où escalade indique si le modèle complet a été utilisé.
+'''
+def predictionCascade(mots, cascade):
+	petit = cascade["petit"]
+	score = scoreEtage(mots, petit)
+	seuil = petit["seuil"]
+	escalade = abs(score - seuil) <= cascade["marge"]
+	if escalade:
+		score = scoreEtage(mots, cascade["complet"])
+		seuil = cascade["complet"]["seuil"]
+
+	return score > seuil, 1 / (1 + np.exp(-np.clip(score, -500, 500))), escalade
+
+
+'''
+	@brief	Compare la cascade et le modèle complet sur une base : taux d'escalade, accord,
+	erreur de test et débit (lecture du mail comprise).
+'''
+def rapportCascade(cascade, base = "basetest"):
+	mails = mails_etiquetes(base)
+	complet = cascade["complet"]
+
+	debut = time.perf_counter()
+	decisions_complet = [scoreEtage(motsFichier(chemin, cascade["lecteur"]), complet) > complet["seuil"] for chemin, _ in mails]
+	duree_complet = time.perf_counter() - debut
+
+	debut = time.perf_counter()
+	resultats = [predictionCascade(motsFichier(chemin, cascade["lecteur"]), cascade) for chemin, _ in mails]
+	duree_cascade = time.perf_counter() - debut
+
+	n = len(mails)
+	escalades = sum(r[2] for r in resultats)
+	accord = sum(r[0] == d for r, d in zip(resultats, decisions_complet))
+	erreurs_complet = sum(d != isSpam for d, (_, isSpam) in zip(decisions_complet, mails))
+	erreurs_cascade = sum(r[0] != isSpam for r, (_, isSpam) in zip(resultats, mails))
+
+	print(f"{n} mails de {base}, petit modèle de {len(cascade['petit']['dictionnaire'])} mots, marge {cascade['marge']:.3f}")
+	print(f"Escalade vers le modèle complet : {100 * escalades / n:.1f} %")
+	print(f"Accord avec le modèle complet : {100 * accord / n:.2f} % (cible {100 * cascade['accord_cible']:.2f} %)")
+	print(f"{'modèle complet':>15} : {n / duree_complet:8.0f} mails/s  erreur {100 * erreurs_complet / n:.2f} %")
+	print(f"{'cascade':>15} : {n / duree_cascade:8.0f} mails/s  erreur {100 * erreurs_cascade / n:.2f} %  (x{duree_complet / duree_cascade:.1f})")
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Classement en cascade : petit modèle puis modèle complet en cas de doute.")
+	parser.add_argument("classifieur", help="Classifieur de saves/ à utiliser comme modèle complet.")
+	parser.add_argument("--mots", type=int, default=NB_MOTS, help="Taille du vocabulaire du petit modèle.")
+	parser.add_argument("--accord", type=float, default=ACCORD_CIBLE, help="Accord visé avec le modèle complet (entre 0 et 1).")
+	parser.add_argument("validation", help="Base de réglage de la bande (sous-dossiers spam/ et ham/), distincte de la base d'apprentissage.")
+	parser.add_argument("--base", default="basetest", help="Base du rapport (sous-dossiers spam/ et ham/).")
+	args = parser.parse_args()
+
+	classifieur = chargerClassifieur(nom=args.classifieur)
+	if classifieur is not None:
+		try:
+			rapportCascade(creerCascade(classifieur, args.validation, args.mots, args.accord), args.base)
+		except ValueError as ex:
+			print(f"Erreur -> {ex}")
+			sys.exit(1)
@@ -0,0 +1,125 @@
+import threading
+from collections import namedtuple
+
+from bayes_classifier import *
+from vocabulaire import Vocabulaire
+
+# ======================================================================================
+# 						CLASSIFIEUR PARTAGÉ ENTRE PLUSIEURS THREADS
+# ======================================================================================
+#
+# Les paramètres sont publiés sous forme d'instantanés immuables. Un écrivain construit le
+# nouvel instantané à part puis le publie par une seule affectation de référence : un
+# thread de prédiction lit l'instantané courant une fois, sans verrou, et ne peut donc
+# jamais voir un bspam nouveau avec un mSpam ancien. Le dictionnaire ne change jamais : il
+# est figé une seule fois (tuple, ou Vocabulaire tel quel) et le même objet est repris par
+# tous les instantanés suivants.
+
+Instantane = namedtuple("Instantane", [
+	"generation", "dictionnaire", "Pspam", "Pham", "bspam", "bham", "mSpam", "mHam", "nspam", "nham", "seuil", "biais_elague", "lecteur"
+])
+
+
+'''
+	@brief	Construit un instantané immuable à partir d'un classifieur (dictionnaire).
+
+	@param classifieur : Classifieur.
+	@param generation : Numéro de l'instantané.
+
+	@return L'instantané.
+'''
+def figerClassifieur(classifieur, generation = 0):
+	dictionnaire = classifieur["dictionnaire"]
+	if not isinstance(dictionnaire, (tuple, Vocabulaire)): # Déjà immuable sinon
+		dictionnaire = tuple(dictionnaire)
+
+	tableaux = {}
+	for cle, isSpam in (("nspam", True), ("nham", False)):
+		tableaux[cle] = np.array(comptesClassifieur(classifieur, isSpam), dtype=float)
+	for cle in ("bspam", "bham"):
+		tableaux[cle] = np.array(classifieur[cle], dtype=float)
+	for tableau in tableaux.values():
+		tableau.flags.writeable = False
+
+	return Instantane(
+		generation = generation,
+		dictionnaire = dictionnaire,
+		Pspam = classifieur["Pspam"],
+		Pham = classifieur["Pham"],
+		mSpam = classifieur["mSpam"],
+		mHam = classifieur["mHam"],
+		seuil = classifieur.get("seuil", 0),
+		biais_elague = classifieur.get("biais_elague"), # None : modèle non élagué
+		lecteur = lecteurClassifieur(classifieur),
+		**tableaux
+	)
+
+
+class ClassifieurConcurrent:
+	'''
+		@brief	Classifieur utilisable par plusieurs threads de prédiction sans verrou, pendant
+		qu'un écrivain applique des mises à jour par lots (copie à l'écriture).
+	'''
+
+	def __init__(self, classifieur):
+		self._verrou = threading.Lock() # Sérialise uniquement les écrivains
+		self._instantane = figerClassifieur(classifieur)
+
+	'''
+		@brief	Renvoie l'instantané courant. Il reste valide et cohérent même si une mise à
+		jour est publiée ensuite.
+	'''
+	def instantane(self):
+		return self._instantane
+
+	'''
+		@brief	Prédit si un mail vectorisé est un SPAM avec l'instantané courant.
+
+		@return (isSpam, Pspam_x, Pham_x, generation) où generation identifie l'instantané utilisé.
+	'''
+	def predire(self, x):
+		s = self._instantane # Une seule lecture de la référence
+		isSpam, Pspam_x, Pham_x = prediction(x, s.Pspam, s.Pham, s.bspam, s.bham, s.seuil, s.biais_elague or 0)
+		return isSpam, Pspam_x, Pham_x, s.generation
+
+	'''
+		@brief	Applique un lot de mails vectorisés puis publie le nouvel instantané.
+
+		@param lot : Liste de couples (x, isSpam).
+
+		@return Le nouvel instantané.
+	'''
+	def appliquerLot(self, lot):
+		with self._verrou:
+			courant = self._instantane
+			if courant.biais_elague is not None:
+				raise ValueError("Un classifieur élagué ne peut pas être mis à jour.")
+			nspam, nham = courant.nspam.copy(), courant.nham.copy()
+			mSpam, mHam = courant.mSpam, courant.mHam
+
+			for x, isSpam in lot:
+				if isSpam:
+					nspam += x
+					mSpam += 1
+				else:
+					nham += x
+					mHam += 1
+
+			classifieur = classifieurDepuisComptes(courant.dictionnaire, nspam, mSpam, nham, mHam, courant.lecteur)
+			classifieur["seuil"] = courant.seuil
+			nouveau = figerClassifieur(classifieur, courant.generation + 1)
+
+			self._instantane = nouveau # Publication : une seule affectation de référence
+			return nouveau
+
+	'''
+		@brief	Renvoie un classifieur (dictionnaire modifiable) copié de l'instantané courant,
+		par exemple pour le sauvegarder. Le dictionnaire de mots, immuable, est partagé.
+	'''
+	def classifieur(self):
+		s = self._instantane
+		classifieur = classifieurDepuisComptes(s.dictionnaire, s.nspam.copy(), s.mSpam, s.nham.copy(), s.mHam, s.lecteur)
+		classifieur["seuil"] = s.seuil
+		if s.biais_elague is not None:
+			classifieur["biais_elague"] = s.biais_elague
+		return classifieur
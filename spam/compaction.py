@@ -0,0 +1,119 @@
+import argparse
+import pickle
+import time
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 						ÉLAGAGE DU VOCABULAIRE ET COMPACTAGE DU MODÈLE
+# ======================================================================================
+#
+# Un mot dont les probabilités SPAM et HAM sont presque égales ne change presque jamais
+# la décision mais coûte une case dans bspam / bham et dans chaque prédiction. L'élagage
+# ne garde que les mots les plus informatifs ; les mots retirés sont considérés comme
+# toujours absents, et leur contribution constante log(1 - bspam) - log(1 - bham) est
+# reportée dans le biais du modèle ("biais_elague"). Ce biais est figé avec les probabilités
+# des mots retirés : un modèle élagué est en lecture seule (voir estElague), on l'obtient de
+# nouveau en élaguant le modèle complet mis à jour.
+
+CRITERES = ("poids", "information")
+
+
+'''
+	@brief	Mesure l'informativité de chaque mot du dictionnaire.
+
+	@param classifieur : Classifieur.
+	@param critere : "poids" (poids log-odds absolu) ou "information" (information mutuelle
+	entre la présence du mot et la classe).
+
+	@return Vecteur d'informativité de taille len(dictionnaire).
+'''
+def informativite(classifieur, critere = "information"):
+	Pspam, Pham, bspam, bham = (classifieur[k] for k in ["Pspam", "Pham", "bspam", "bham"])
+
+	if critere == "poids":
+		return np.abs(poidsLogOdds(Pspam, Pham, bspam, bham)[1])
+
+	if critere == "information":
+		information = np.zeros(len(bspam))
+		px1 = Pspam * bspam + Pham * bham # P(mot présent)
+		for py, b in ((Pspam, bspam), (Pham, bham)):
+			for pxy, px in ((py * b, px1), (py * (1 - b), 1 - px1)):
+				information += pxy * np.log(pxy / (px * py))
+		return information
+
+	raise ValueError(f"Critère inconnu : {critere} (attendu : {', '.join(CRITERES)})")
+
+
+'''
+	@brief	Construit un classifieur ne gardant que les mots les plus informatifs.
+
+	@param classifieur : Classifieur à élaguer.
+	@param nb_mots : Nombre de mots à garder.
+	@param critere : Critère d'informativité (voir informativite).
+
+	@return Le classifieur élagué.
+'''
+def elaguerClassifieur(classifieur, nb_mots, critere = "information"):
+	bspam, bham = classifieur["bspam"], classifieur["bham"]
+	scores = informativite(classifieur, critere)
+
+	# On garde l'ordre du dictionnaire d'origine parmi les mots retenus
+	gardes = np.sort(np.argsort(-scores, kind="stable")[:nb_mots])
+	retires = np.ones(len(bspam), dtype=bool)
+	retires[gardes] = False
+
+	elague = dict(classifieur)
+	elague.pop("journal", None) # Les indices du journal ne correspondent plus au dictionnaire
+	elague["generation"] = generationSuivante()
+	elague["dictionnaire"] = [classifieur["dictionnaire"][i] for i in gardes]
+	for cle in ("bspam", "bham"):
+		elague[cle] = classifieur[cle][gardes]
+	for cle, isSpam in (("nspam", True), ("nham", False)):
+		elague[cle] = comptesClassifieur(classifieur, isSpam)[gardes]
+
+	elague["biais_elague"] = classifieur.get("biais_elague", 0) + float(np.sum(np.log(1 - bspam[retires]) - np.log(1 - bham[retires])))
+	return elague
+
+
+'''
+	@brief	Affiche, pour plusieurs niveaux d'élagage, la taille du modèle, le débit de
+	prédiction (lecture du mail comprise) et l'erreur de test.
+
+	@param niveaux : Proportions du dictionnaire à garder.
+'''
+def rapportElagage(classifieur, base = "basetest", critere = "information", niveaux = (1.0, 0.5, 0.25, 0.1, 0.05, 0.02)):
+	mails = mails_etiquetes(base)
+	print(f"{'mots':>6} {'taille (octets)':>16} {'µs/mail':>10} {'erreur':>8}")
+
+	for niveau in niveaux:
+		modele = elaguerClassifieur(classifieur, max(1, int(niveau * len(classifieur["dictionnaire"]))), critere)
+		Pspam, Pham, bspam, bham, dictionnaire = (modele[k] for k in ["Pspam", "Pham", "bspam", "bham", "dictionnaire"])
+		seuil, biais_elague = modele.get("seuil", 0), modele["biais_elague"]
+
+		erreurs = 0
+		debut = time.perf_counter()
+		for chemin, isSpam in mails:
+			x = lireMail(chemin, dictionnaire, lecteurClassifieur(modele))
+			erreurs += prediction(x, Pspam, Pham, bspam, bham, seuil, biais_elague)[0] != isSpam
+		duree = time.perf_counter() - debut
+
+		print(f"{len(dictionnaire):>6} {len(pickle.dumps(modele)):>16} {1e6 * duree / len(mails):>10.1f} {100 * erreurs / len(mails):>7.2f} %")
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Élagage du vocabulaire d'un classifieur.")
+	parser.add_argument("classifieur", help="Classifieur de saves/ à élaguer.")
+	parser.add_argument("--critere", choices=CRITERES, default="information", help="Critère d'informativité des mots.")
+	parser.add_argument("--base", default="basetest", help="Base de test du rapport (sous-dossiers spam/ et ham/).")
+	parser.add_argument("--garder", type=int, help="Sauvegarde un modèle élagué à ce nombre de mots.")
+	parser.add_argument("--nom", help="Nom du modèle élagué sauvegardé dans saves/.")
+	args = parser.parse_args()
+
+	classifieur = chargerClassifieur(nom=args.classifieur)
+	if classifieur is not None:
+		rapportElagage(classifieur, args.base, args.critere)
+		if args.garder:
+			nom = args.nom or args.classifieur.replace(".pkl", f"_{args.garder}.pkl")
+			if sauvegarderClassifieur(elaguerClassifieur(classifieur, args.garder, args.critere), nom=nom):
+				print(f"Modèle élagué à {args.garder} mots sauvegardé sous {nom}.")
@@ -0,0 +1,137 @@
+import argparse
+import time
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 						COMPARAISON DE PLUSIEURS CLASSIFIEURS
+# ======================================================================================
+#
+# Chaque mail de la base de test est lu et découpé en mots une seule fois : ses mots sont
+# repérés dans un index commun (l'union des dictionnaires des modèles), puis chaque modèle
+# traduit cet index vers son propre dictionnaire par un simple tableau. Le score de tous
+# les mails par un modèle se calcule alors d'un coup (somme des poids log-odds des mots
+# présents, par mail), sans relire ni revectoriser la base. Les modèles appris avec des
+# lecteurs différents (voir LECTEURS) ne voient pas les mêmes mots : la base est alors
+# découpée une fois par lecteur.
+
+
+'''
+	@brief	Lit et découpe une base une seule fois pour plusieurs dictionnaires.
+
+	@param base : Base de test (sous-dossiers spam/ et ham/).
+	@param dictionnaires : Dictionnaires des modèles.
+	@param lecteur : Lecteur des mails (voir LECTEURS).
+
+	@return (labels, lignes, ids, index) : labels des mails, et pour chaque couple
+	(mail, mot présent) le numéro du mail (lignes) et l'identifiant du mot dans l'index
+	commun (ids) ; index associe un identifiant à chaque mot connu d'au moins un modèle.
+'''
+def decouperBase(base, dictionnaires, lecteur = "texte"):
+	index = {}
+	for dictionnaire in dictionnaires:
+		for mot in dictionnaire:
+			index.setdefault(mot, len(index))
+
+	mails = mails_etiquetes(base)
+	lignes, ids = [], []
+	for ligne, (chemin, _) in enumerate(mails):
+		try:
+			mots = set(extraireMots(lireTexte(chemin, lecteur)))
+		except Exception as ex:
+			print(f"Erreur lors de la lecture de {chemin} : {ex}")
+			continue
+		presents = [index[mot] for mot in mots if mot in index]
+		lignes += [ligne] * len(presents)
+		ids += presents
+
+	labels = np.array([isSpam for _, isSpam in mails], dtype=bool)
+	return labels, np.array(lignes, dtype=np.int64), np.array(ids, dtype=np.int64), index
+
+
+'''
+	@brief	Scores log-odds de tous les mails d'une base découpée par un classifieur.
+
+	@return Vecteur des scores, à comparer au seuil du classifieur.
+'''
+def scoresDecoupes(classifieur, nb_mails, lignes, ids, index):
+	# Identifiant commun -> position dans le dictionnaire du modèle (première occurrence)
+	colonnes = np.full(len(index), -1, dtype=np.int64)
+	for i, mot in enumerate(classifieur["dictionnaire"]):
+		if colonnes[index[mot]] < 0:
+			colonnes[index[mot]] = i
+
+	biais, poids = poidsClassifieur(classifieur)
+	cols = colonnes[ids]
+	connus = cols >= 0
+	return biais + np.bincount(lignes[connus], weights=poids[cols[connus]], minlength=nb_mails)
+
+
+'''
+	@brief	Compare plusieurs classifieurs sauvegardés sur une même base et affiche un tableau
+	des erreurs, des matrices de confusion et des débits.
+
+	@param noms : Noms des classifieurs dans le dossier de sauvegarde.
+	@param base : Base de test (sous-dossiers spam/ et ham/).
+
+	@return Dictionnaire {nom: {"erreur", "erreur_spam", "erreur_ham", "vp", "fn", "fp", "vn", "debit"}}.
+'''
+def comparerClassifieurs(noms, base = "basetest", dossier = "saves"):
+	classifieurs = {}
+	for nom in noms:
+		classifieur = chargerClassifieur(dossier, nom) # Journal de mises à jour rejoué
+		if classifieur is None:
+			continue
+		classifieurs[nom] = classifieur
+	if not classifieurs:
+		return {}
+
+	debut = time.perf_counter()
+	decoupes = {}
+	for lecteur in sorted({lecteurClassifieur(c) for c in classifieurs.values()}):
+		dictionnaires = [c["dictionnaire"] for c in classifieurs.values() if lecteurClassifieur(c) == lecteur]
+		decoupes[lecteur] = decouperBase(base, dictionnaires, lecteur)
+	duree_decoupage = time.perf_counter() - debut
+
+	resultats = {}
+	for nom, classifieur in classifieurs.items():
+		labels, lignes, ids, index = decoupes[lecteurClassifieur(classifieur)]
+		n = len(labels)
+		debut = time.perf_counter()
+		isSpam = scoresDecoupes(classifieur, n, lignes, ids, index) > classifieur.get("seuil", 0)
+		duree = time.perf_counter() - debut
+
+		vp, fn = int(np.sum(isSpam & labels)), int(np.sum(~isSpam & labels))
+		fp, vn = int(np.sum(isSpam & ~labels)), int(np.sum(~isSpam & ~labels))
+		resultats[nom] = {
+			"erreur": 100 * (fn + fp) / max(n, 1),
+			"erreur_spam": 100 * fn / max(vp + fn, 1),
+			"erreur_ham": 100 * fp / max(fp + vn, 1),
+			"vp": vp, "fn": fn, "fp": fp, "vn": vn,
+			"debit": n / duree if duree > 0 else float("inf"),
+		}
+
+		# Seulement si le modèle testé est la sauvegarde elle-même (journal vide, voir noterErreurTest)
+		if base == "basetest":
+			noterErreurTest(classifieur, resultats[nom]["erreur"], dossier, nom)
+
+	print(
+		f"{n} mails de {base} lus et découpés une fois par lecteur ({', '.join(decoupes)}) en {duree_decoupage:.2f} s"
+		f" ({sum(len(d[3]) for d in decoupes.values())} mots connus d'au moins un modèle)"
+	)
+	print(f"{'nom':<30} {'mots':>7} {'err SPAM':>9} {'err HAM':>9} {'erreur':>8} {'VP':>6} {'FN':>6} {'FP':>6} {'VN':>6} {'mails/s':>10}")
+	for nom, r in resultats.items():
+		print(
+			f"{nom:<30} {len(classifieurs[nom]['dictionnaire']):>7} {r['erreur_spam']:>8.2f}% {r['erreur_ham']:>8.2f}% {r['erreur']:>7.2f}%"
+			f" {r['vp']:>6} {r['fn']:>6} {r['fp']:>6} {r['vn']:>6} {r['debit']:>10.0f}"
+		)
+	return resultats
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Compare plusieurs classifieurs sauvegardés sur une même base de test.")
+	parser.add_argument("classifieurs", nargs="*", help="Classifieurs de saves/ à comparer (tous par défaut).")
+	parser.add_argument("--base", default="basetest", help="Base de test (sous-dossiers spam/ et ham/).")
+	args = parser.parse_args()
+
+	comparerClassifieurs(args.classifieurs or sorted(lireCatalogue("saves")), args.base)
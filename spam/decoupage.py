@@ -0,0 +1,175 @@
+import argparse
+import hashlib
+import heapq
+import json
+import os
+import sys
+import tarfile
+
+from bayes_classifier import *
+from deduplication import coefficientsHachage, signatureMinHash
+
+# ======================================================================================
+# 						DÉCOUPAGE APPRENTISSAGE / TEST EN FLUX
+# ======================================================================================
+#
+# Chaque mail est affecté à l'apprentissage ou au test dès qu'il est lu, en une seule
+# passe, par une empreinte (graine + clé du mail) ramenée dans [0, 1) et comparée au ratio :
+# l'affectation ne dépend que du mail et de la graine, elle est donc identique d'une
+# exécution à l'autre et un mail ajouté plus tard ne déplace aucun des autres.
+#
+# Clés possibles :
+#	nom     : nom du fichier
+#	contenu : contenu du mail (les doublons exacts tombent du même côté)
+#	grappe  : première valeur MinHash des mots du mail (voir deduplication.py) ; deux mails
+#	          de similarité de Jaccard J tombent du même côté avec une probabilité d'au moins J
+#
+# Un plafond optionnel par classe et par ensemble garde les max mails de plus petite
+# priorité (seconde empreinte) : c'est un réservoir « bottom-k » déterministe. Seuls les
+# noms des mails gardés sont en mémoire ; un mail évincé est retiré du dossier de sortie.
+# La mémoire utilisée ne dépend donc pas de la taille du corpus.
+
+CLES = ("nom", "contenu", "grappe")
+CLASSES = ("spam", "ham")
+COEFFICIENTS_GRAPPE = coefficientsHachage(0, 1) # Une seule fonction de hachage MinHash
+
+
+'''
+	@brief	Mails de dossiers de classes, parcourus avec os.scandir (sans liste complète).
+
+	@param dossiers : Dictionnaire {classe: dossier}.
+
+	@return Générateur de triplets (classe, nom, contenu en octets).
+'''
+def sourceDossiers(dossiers):
+	for label, dossier in dossiers.items():
+		with os.scandir(dossier) as entrees:
+			for entree in entrees:
+				if entree.is_file():
+					with open(entree.path, "rb") as f:
+						yield label, entree.name, f.read()
+
+
+'''
+	@brief	Mails d'une archive tar lue en flux (fichier ou "-" pour l'entrée standard, avec
+	ou sans compression). La classe d'un mail est le premier répertoire "spam" ou "ham" de
+	son chemin dans l'archive ; les autres membres sont ignorés.
+
+	@return Générateur de triplets (classe, nom, contenu en octets).
+'''
+def sourceTar(chemin):
+	flux = sys.stdin.buffer if chemin == "-" else None
+	with tarfile.open(chemin if flux is None else None, mode="r|*", fileobj=flux) as archive:
+		for membre in archive:
+			if not membre.isfile():
+				continue
+			parties = membre.name.split("/")
+			label = next((p for p in parties[:-1] if p in CLASSES), None)
+			if label is None:
+				continue
+			# Le nom garde les sous-dossiers pour éviter les collisions
+			nom = "_".join(parties[parties.index(label) + 1:])
+			yield label, nom, archive.extractfile(membre).read()
+
+
+'''
+	@brief	Clé d'affectation d'un mail.
+'''
+def cleMail(nom, contenu, cle = "nom"):
+	if cle == "nom":
+		return nom.encode("utf-8")
+	if cle == "contenu":
+		return contenu
+	if cle == "grappe":
+		mots = set(extraireMots(contenu.decode("utf-8", errors="ignore").lower()))
+		return str(int(signatureMinHash(mots, COEFFICIENTS_GRAPPE)[0])).encode()
+	raise ValueError(f"Clé inconnue : {cle} (attendu : {', '.join(CLES)})")
+
+
+'''
+	@brief	Empreinte d'une clé ramenée dans [0, 1).
+'''
+def uniforme(graine, cle, usage):
+	h = hashlib.blake2b(cle, digest_size=8, key=f"{graine}:{usage}".encode())
+	return int.from_bytes(h.digest(), "big") / 2**64
+
+
+'''
+	@brief	Découpe un flux de mails en apprentissage et test, en une passe et en mémoire
+	constante (hors réservoirs). Les mails sont écrits dans dossier_sortie/{train,test}/<classe>/,
+	et les paramètres du découpage dans dossier_sortie/split.json.
+
+	@param elements : Itérable de triplets (classe, nom, contenu en octets).
+	@param ratios : Dictionnaire {classe: proportion d'apprentissage}.
+	@param graine : Graine des empreintes ; la même graine redonne le même découpage.
+	@param cle : Clé d'affectation (voir CLES).
+	@param max_train : Nombre maximal de mails d'apprentissage par classe (None : illimité).
+	@param max_test : Nombre maximal de mails de test par classe (None : illimité).
+
+	@return Dictionnaire {(ensemble, classe): nombre de mails écrits}.
+'''
+def decouperFlux(elements, dossier_sortie, ratios, graine = 0, cle = "nom", max_train = None, max_test = None):
+	plafonds = {"train": max_train, "test": max_test}
+	reservoirs = {} # (ensemble, classe) -> tas de (-priorité, nom) des mails gardés
+	comptes = {}
+
+	for ensemble in plafonds:
+		for label in ratios:
+			os.makedirs(os.path.join(dossier_sortie, ensemble, label), exist_ok=True)
+			reservoirs[(ensemble, label)] = []
+			comptes[(ensemble, label)] = 0
+
+	with open(os.path.join(dossier_sortie, "split.json"), "w", encoding="utf-8") as f:
+		json.dump({"graine": graine, "cle": cle, "ratios": ratios, "max_train": max_train, "max_test": max_test}, f, indent=1)
+
+	for label, nom, contenu in elements:
+		if label not in ratios:
+			continue
+		k = cleMail(nom, contenu, cle)
+		ensemble = "train" if uniforme(graine, k, "ensemble") < ratios[label] else "test"
+		chemin = os.path.join(dossier_sortie, ensemble, label, nom)
+
+		plafond = plafonds[ensemble]
+		if plafond is not None:
+			tas = reservoirs[(ensemble, label)]
+			priorite = uniforme(graine, nom.encode("utf-8") + b"\0" + k, "reservoir")
+			if len(tas) < plafond:
+				heapq.heappush(tas, (-priorite, nom))
+			elif plafond > 0 and -tas[0][0] > priorite:
+				_, evince = heapq.heapreplace(tas, (-priorite, nom))
+				os.remove(os.path.join(dossier_sortie, ensemble, label, evince))
+				comptes[(ensemble, label)] -= 1
+			else:
+				continue
+
+		with open(chemin, "wb") as f:
+			f.write(contenu)
+		comptes[(ensemble, label)] += 1
+
+	return comptes
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Découpe un corpus de mails en apprentissage et test, en flux.")
+	parser.add_argument("--spams", help="Dossier des SPAM.")
+	parser.add_argument("--hams", help="Dossier des HAM.")
+	parser.add_argument("--tar", help="Archive tar (éventuellement compressée, '-' pour l'entrée standard) contenant des dossiers spam/ et ham/.")
+	parser.add_argument("--sortie", default="dataset", help="Dossier de sortie.")
+	parser.add_argument("--ratio-spam", type=float, default=0.7, help="Proportion des SPAM en apprentissage.")
+	parser.add_argument("--ratio-ham", type=float, default=0.7, help="Proportion des HAM en apprentissage.")
+	parser.add_argument("--graine", type=int, default=0, help="Graine du découpage.")
+	parser.add_argument("--cle", choices=CLES, default="nom", help="Clé d'affectation des mails.")
+	parser.add_argument("--max-train", type=int, help="Nombre maximal de mails d'apprentissage par classe.")
+	parser.add_argument("--max-test", type=int, help="Nombre maximal de mails de test par classe.")
+	args = parser.parse_args()
+
+	if args.tar:
+		elements = sourceTar(args.tar)
+	elif args.spams and args.hams:
+		elements = sourceDossiers({"spam": args.spams, "ham": args.hams})
+	else:
+		parser.error("indiquer --tar ou bien --spams et --hams")
+
+	comptes = decouperFlux(elements, args.sortie, {"spam": args.ratio_spam, "ham": args.ratio_ham}, args.graine, args.cle, args.max_train, args.max_test)
+	for label in CLASSES:
+		print(f"{label.upper()} : {comptes[('train', label)]} pour train, {comptes[('test', label)]} pour test")
@@ -0,0 +1,209 @@
+import random
+import zlib
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 						DÉDUPLICATION DES QUASI-DOUBLONS (MINHASH + LSH)
+# ======================================================================================
+#
+# Chaque mail est réduit à l'ensemble de ses mots, puis à une signature MinHash de
+# NB_HACHAGES entiers. Les signatures sont découpées en bandes : deux mails qui partagent
+# une bande complète sont candidats, et sont regroupés si la similarité de Jaccard
+# estimée dépasse le seuil. Le regroupement est en temps quasi linéaire.
+
+NB_HACHAGES = 64
+NB_BANDES = 8		# NB_HACHAGES / NB_BANDES lignes par bande
+SEUIL_JACCARD = 0.8
+PREMIER = (1 << 31) - 1
+
+
+'''
+	@brief	Lit un mail et renvoie l'ensemble de ses mots (même découpage que lireMail).
+
+	@param fichier : Chemin du mail.
+	@param lecteur : Lecteur des mails (voir LECTEURS).
+	@param journal : Journal d'ingestion dans lequel noter le mail (voir lireMailJournal).
+	@param isSpam : Classe du mail, notée dans le journal.
+
+	@return Ensemble des mots du mail.
+'''
+def ensembleMots(fichier, lecteur = "texte", journal = None, isSpam = None):
+	fichier = os.path.abspath(fichier)
+	try:
+		st = os.stat(fichier)
+		contenu = lireContenu(fichier, lecteur)
+	except Exception as ex:
+		print(f"Erreur lors de la lecture de {fichier} : {ex}")
+		return set()
+
+	if journal is not None:
+		empreinte = hashlib.blake2b(contenu, digest_size=16).hexdigest()
+		journal["empreintes"][empreinte] = isSpam
+		journal["fichiers"][fichier] = ((st.st_size, st.st_mtime_ns), empreinte)
+	return set(extraireMots(texteContenu(contenu, lecteur)))
+
+
+'''
+	@brief	Tire les coefficients des fonctions de hachage h(t) = (a * t + b) mod PREMIER.
+
+	@return Couple de vecteurs (a, b) de taille NB_HACHAGES.
+'''
+def coefficientsHachage(graine = 0, nb_hachages = NB_HACHAGES):
+	generateur = np.random.default_rng(graine)
+	a = generateur.integers(1, PREMIER, nb_hachages, dtype=np.uint64)
+	b = generateur.integers(0, PREMIER, nb_hachages, dtype=np.uint64)
+	return a, b
+
+
+'''
+	@brief	Calcule la signature MinHash d'un ensemble de mots.
+
+	@param mots : Ensemble de mots.
+	@param coefficients : Coefficients (a, b) des fonctions de hachage.
+
+	@return Vecteur de NB_HACHAGES entiers.
+'''
+def signatureMinHash(mots, coefficients):
+	a, b = coefficients
+	if not mots:
+		return np.full(len(a), PREMIER, dtype=np.uint64)
+
+	# crc32 est stable d'un processus à l'autre, contrairement à hash()
+	t = np.fromiter((zlib.crc32(mot.encode()) % PREMIER for mot in mots), dtype=np.uint64, count=len(mots))
+	return ((a[:, None] * t[None, :] + b[:, None]) % PREMIER).min(axis=1)
+
+
+'''
+	@brief	Regroupe les ensembles de mots quasi identiques.
+
+	@param ensembles : Liste d'ensembles de mots.
+	@param seuil : Similarité de Jaccard estimée à partir de laquelle deux mails sont regroupés.
+
+	@return Liste donnant, pour chaque ensemble, l'indice du représentant de son groupe
+	(le premier ensemble du groupe).
+'''
+def grappes(ensembles, seuil = SEUIL_JACCARD, nb_bandes = NB_BANDES, graine = 0):
+	coefficients = coefficientsHachage(graine)
+	signatures = [signatureMinHash(mots, coefficients) for mots in ensembles]
+	lignes = NB_HACHAGES // nb_bandes
+
+	parents = list(range(len(ensembles)))
+
+	def racine(i):
+		while parents[i] != i:
+			parents[i] = parents[parents[i]]
+			i = parents[i]
+		return i
+
+	seaux = {}
+	for i, signature in enumerate(signatures):
+		for bande in range(nb_bandes):
+			cle = (bande, signature[bande * lignes:(bande + 1) * lignes].tobytes())
+			j = seaux.setdefault(cle, i)
+			if j == i:
+				continue
+			ri, rj = racine(i), racine(j)
+			if ri != rj and np.mean(signatures[i] == signatures[j]) >= seuil:
+				parents[max(ri, rj)] = min(ri, rj)
+
+	return [racine(i) for i in range(len(ensembles))]
+
+
+'''
+	@brief	Calcule les groupes de quasi-doublons des fichiers d'un dossier.
+
+	@param dossier : Dossier des mails.
+	@param fichiers : Noms des fichiers (tout le dossier par défaut).
+	@param lecteur : Lecteur des mails (voir LECTEURS).
+	@param journal : Journal d'ingestion dans lequel noter les mails lus (voir ensembleMots).
+	@param isSpam : Classe des mails, notée dans le journal.
+
+	@return (fichiers, ensembles, representants) où representants[i] est l'indice du
+	représentant du groupe du fichier i.
+'''
+def grappesDossier(dossier, fichiers = None, seuil = SEUIL_JACCARD, lecteur = "texte", journal = None, isSpam = None):
+	if fichiers is None:
+		fichiers = sorted(os.listdir(dossier))
+	ensembles = [ensembleMots(os.path.join(dossier, f), lecteur, journal, isSpam) for f in fichiers]
+	return fichiers, ensembles, grappes(ensembles, seuil)
+
+
+'''
+	@brief	Comptes par mot d'une classe après déduplication.
+
+	@param mode : "supprimer" ne garde que le représentant de chaque groupe, "ponderer" garde
+	tous les mails avec un poids 1 / taille du groupe.
+
+	@return (comptes, nombre de mails équivalent).
+'''
+def comptesDedupliques(ensembles, representants, dictionnaire, mode = "supprimer"):
+	tailles = {}
+	for r in representants:
+		tailles[r] = tailles.get(r, 0) + 1
+
+	n = np.zeros(len(dictionnaire))
+	for i, mots in enumerate(ensembles):
+		if mode == "supprimer":
+			if representants[i] == i:
+				n += vecteurMots(mots, dictionnaire)
+		else:
+			n += vecteurMots(mots, dictionnaire) / tailles[representants[i]]
+
+	return n, len(tailles)
+
+
+'''
+	@brief	Construit un classifieur en regroupant les quasi-doublons de chaque classe. Tous
+	les mails lus, regroupés ou non, sont notés dans le journal d'ingestion : une mise à
+	jour ultérieure sur les mêmes dossiers ne les compte pas une seconde fois (un mail qui
+	change de classe est alors retiré comme un mail entier).
+
+	@param mode : "supprimer" ou "ponderer" (voir comptesDedupliques).
+	@param lecteur : Lecteur des mails (voir LECTEURS), noté dans le classifieur.
+
+	@return Le classifieur.
+'''
+def creerClassifieurDedup(dossier_spams, dossier_hams, dictionnaire, mode = "supprimer", seuil = SEUIL_JACCARD, lecteur = "texte"):
+	verifierLecteur(lecteur)
+	journal = {"empreintes": {}, "fichiers": {}}
+
+	_, ensembles, representants = grappesDossier(dossier_spams, seuil=seuil, lecteur=lecteur, journal=journal, isSpam=True)
+	nspam, mSpam = comptesDedupliques(ensembles, representants, dictionnaire, mode)
+
+	_, ensembles, representants = grappesDossier(dossier_hams, seuil=seuil, lecteur=lecteur, journal=journal, isSpam=False)
+	nham, mHam = comptesDedupliques(ensembles, representants, dictionnaire, mode)
+
+	return classifieurDepuisComptes(dictionnaire, nspam, mSpam, nham, mHam, lecteur, journal)
+
+
+'''
+	@brief	Sépare les fichiers d'un dossier en apprentissage / test par groupes entiers de
+	quasi-doublons : aucun groupe n'est à cheval sur les deux ensembles. Les groupes, pris
+	dans un ordre aléatoire, vont à l'apprentissage tant qu'ils y tiennent sans dépasser
+	ratio * nombre de mails ; les autres vont au test.
+
+	@param ratio : Proportion (en nombre de mails) destinée à l'apprentissage.
+	@param graine : Graine du mélange des groupes.
+
+	@return (fichiers d'apprentissage, fichiers de test).
+'''
+def splitParGrappes(dossier, ratio, graine = None, seuil = SEUIL_JACCARD):
+	fichiers = [f for f in sorted(os.listdir(dossier)) if os.path.isfile(os.path.join(dossier, f))]
+	fichiers, _, representants = grappesDossier(dossier, fichiers, seuil)
+
+	groupes = {}
+	for f, r in zip(fichiers, representants):
+		groupes.setdefault(r, []).append(f)
+	groupes = list(groupes.values())
+	random.Random(graine).shuffle(groupes)
+
+	# Une grande campagne compte pour tous ses mails, pas pour un seul groupe
+	objectif = round(ratio * len(fichiers))
+	train, test = [], []
+	for groupe in groupes:
+		if len(train) + len(groupe) <= objectif:
+			train += groupe
+		else:
+			test += groupe
+	return train, test
@@ -0,0 +1,82 @@
+import argparse
+import os
+from multiprocessing import Pool
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 							APPRENTISSAGE DISTRIBUÉ (MAP / REDUCE)
+# ======================================================================================
+#
+# Chaque fragment du corpus est appris dans un processus séparé (qui tient lieu de
+# machine distante), puis les classifieurs obtenus sont fusionnés par addition de leurs
+# comptes. Le classifieur fusionné est identique à celui appris sur tout le corpus.
+
+
+'''
+	@brief	Apprend un classifieur sur un fragment du corpus (étape map).
+
+	@param fragment : Tuple (dossier_spams, fichiers_spams, dossier_hams, fichiers_hams, dictionnaire, lecteur).
+
+	@return Le classifieur du fragment.
+'''
+def entrainer_fragment(fragment):
+	dossier_spams, fichiers_spams, dossier_hams, fichiers_hams, dictionnaire, lecteur = fragment
+	return creerClassifieur(dossier_spams, dossier_hams, dictionnaire, fichiers_spams, fichiers_hams, lecteur)
+
+
+'''
+	@brief	Découpe les dossiers de SPAM et de HAM en fragments, les apprend dans des
+	processus séparés puis fusionne les classifieurs obtenus (étape reduce).
+
+	@param dossier_spams : Dossier des SPAM d'apprentissage.
+	@param dossier_hams : Dossier des HAM d'apprentissage.
+	@param dictionnaire : Mots connus sur lesquels apprendre.
+	@param nb_fragments : Nombre de fragments (et de processus).
+	@param lecteur : Lecteur des mails (voir LECTEURS).
+
+	@return Le classifieur fusionné.
+'''
+def entrainer_distribue(dossier_spams, dossier_hams, dictionnaire, nb_fragments = 4, lecteur = "texte"):
+	fichiers_spams = sorted(os.listdir(dossier_spams))
+	fichiers_hams = sorted(os.listdir(dossier_hams))
+
+	# Chaque fragment doit contenir au moins un mail de chaque classe
+	nb_fragments = max(1, min(nb_fragments, len(fichiers_spams), len(fichiers_hams)))
+	fragments = [
+		(dossier_spams, fichiers_spams[i::nb_fragments], dossier_hams, fichiers_hams[i::nb_fragments], dictionnaire, lecteur)
+		for i in range(nb_fragments)
+	]
+
+	with Pool(nb_fragments) as pool:
+		classifieurs = pool.map(entrainer_fragment, fragments)
+
+	return fusionnerClassifieurs(classifieurs)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Apprentissage distribué et fusion de classifieurs.")
+	commandes = parser.add_subparsers(dest="commande", required=True)
+
+	entrainer = commandes.add_parser("entrainer", help="Apprend un classifieur par fragments sur plusieurs processus.")
+	entrainer.add_argument("--spams", default="baseapp/spam", help="Dossier des SPAM d'apprentissage.")
+	entrainer.add_argument("--hams", default="baseapp/ham", help="Dossier des HAM d'apprentissage.")
+	entrainer.add_argument("--dico", default="dics/dictionnaire1000en.txt", help="Dictionnaire à utiliser.")
+	entrainer.add_argument("--fragments", type=int, default=4, help="Nombre de fragments / processus.")
+	entrainer.add_argument("--lecteur", choices=LECTEURS, default="texte", help="Lecteur des mails (mime : parties texte décodées).")
+	entrainer.add_argument("--nom", default="distribue.pkl", help="Nom du classifieur sauvegardé dans saves/.")
+
+	fusionner = commandes.add_parser("fusionner", help="Fusionne des classifieurs sauvegardés dans saves/.")
+	fusionner.add_argument("noms", nargs="+", help="Noms des classifieurs à fusionner.")
+	fusionner.add_argument("--nom", default="fusion.pkl", help="Nom du classifieur fusionné.")
+
+	args = parser.parse_args()
+
+	if args.commande == "entrainer":
+		classifieur = entrainer_distribue(args.spams, args.hams, charge_dico(args.dico), args.fragments, args.lecteur)
+	else:
+		classifieurs = [chargerClassifieur(nom=nom) for nom in args.noms]
+		classifieur = None if None in classifieurs else fusionnerClassifieurs(classifieurs)
+
+	if classifieur is not None and sauvegarderClassifieur(classifieur, nom=args.nom):
+		print(f"Classifieur sauvegardé sous {args.nom}.")
@@ -0,0 +1,166 @@
+import argparse
+
+from bayes_classifier import *
+from journal_maj import compacterJournal
+
+# ======================================================================================
+# 						ÉVALUATION : SEUIL DE DÉCISION, COURBES ROC ET PR
+# ======================================================================================
+#
+# Le score log-odds de chaque mail de test (logPspam - logPham) est calculé une seule
+# fois. Un seul tri de ces scores donne ensuite les courbes ROC / PR complètes, les
+# erreurs à n'importe quel seuil et le seuil recommandé pour un taux de faux positifs
+# (HAM classés SPAM) cible.
+
+
+'''
+	@brief	Calcule le score log-odds de chaque mail d'une base de test étiquetée.
+
+	@param classifieur : Classifieur.
+	@param base : Dossier contenant les sous-dossiers spam/ et ham/.
+
+	@return (scores, labels) : tableaux des scores et des étiquettes (True pour SPAM).
+'''
+def scoresBase(classifieur, base = "basetest"):
+	dictionnaire = classifieur["dictionnaire"]
+	biais, poids = poidsClassifieur(classifieur)
+
+	mails = mails_etiquetes(base)
+	lecteur = lecteurClassifieur(classifieur)
+	scores = np.array([biais + poids[lireMail(chemin, dictionnaire, lecteur)].sum() for chemin, _ in mails])
+	labels = np.array([isSpam for _, isSpam in mails], dtype=bool)
+	return scores, labels
+
+
+'''
+	@brief	Calcule les courbes ROC et PR à partir des scores, avec un seul tri. Le point i
+	correspond à la décision "SPAM si score > seuils[i]" ; le premier point (aucun SPAM)
+	est inclus.
+
+	@param scores : Scores log-odds.
+	@param labels : Étiquettes (True pour SPAM).
+
+	@return Dictionnaire de tableaux {"seuils", "vp", "fp", "tpr", "fpr", "precision"}, des scores
+	distincts "valeurs" (décroissants) et des nombres de SPAM "P" et de HAM "N".
+'''
+def courbes(scores, labels):
+	ordre = np.argsort(-scores, kind="stable")
+	s = scores[ordre]
+	y = labels[ordre]
+
+	vp = np.cumsum(y)
+	fp = np.cumsum(~y)
+
+	# On ne garde que le dernier mail de chaque groupe de scores égaux
+	fins = np.flatnonzero(np.append(s[1:] != s[:-1], True))
+	seuils = np.append((s[fins[:-1]] + s[fins[:-1] + 1]) / 2, s[-1] - 1)
+
+	P, N = int(y.sum()), int((~y).sum())
+	vp = np.append(0, vp[fins])
+	fp = np.append(0, fp[fins])
+	with np.errstate(invalid="ignore", divide="ignore"):
+		precision = np.where(vp + fp > 0, vp / (vp + fp), 1.0)
+
+	return {
+		"seuils": np.append(s[0], seuils),
+		"vp": vp,
+		"fp": fp,
+		"tpr": vp / max(P, 1),
+		"fpr": fp / max(N, 1),
+		"precision": precision,
+		"valeurs": s[fins],
+		"P": P,
+		"N": N
+	}
+
+
+'''
+	@brief	Aire sous la courbe ROC.
+'''
+def aireROC(c):
+	return float(np.sum(np.diff(c["fpr"]) * (c["tpr"][1:] + c["tpr"][:-1]) / 2))
+
+
+'''
+	@brief	Taux d'erreur pour la décision "SPAM si score > seuil", lus sur les courbes.
+
+	@return (erreur SPAM, erreur HAM, erreur globale)
+'''
+def erreursAuSeuil(c, seuil):
+	# Le point i regroupe les i scores distincts les plus élevés : on compte ceux > seuil
+	i = int(np.searchsorted(-c["valeurs"], -seuil, side="left"))
+	fn = c["P"] - c["vp"][i]
+	fp = c["fp"][i]
+	return fn / max(c["P"], 1), fp / max(c["N"], 1), (fn + fp) / max(c["P"] + c["N"], 1)
+
+
+'''
+	@brief	Seuil qui maximise le taux de SPAM détectés sous un taux de faux positifs cible.
+
+	@param c : Courbes calculées par courbes().
+	@param fpr_cible : Taux de faux positifs (HAM classés SPAM) maximal.
+
+	@return Le seuil recommandé.
+'''
+def seuilPourFpr(c, fpr_cible):
+	admissibles = np.flatnonzero(c["fpr"] <= fpr_cible)
+	return float(c["seuils"][admissibles[-1]])
+
+
+'''
+	@brief	Table de calibration : répartit les mails par probabilité P(SPAM | x) prédite et
+	compare, dans chaque tranche, la probabilité moyenne prédite à la proportion réelle de SPAM.
+
+	@return Liste de tuples (borne basse, borne haute, nombre de mails, probabilité moyenne, proportion de SPAM).
+'''
+def calibration(scores, labels, nb_tranches = 10):
+	probas = 1 / (1 + np.exp(-np.clip(scores, -500, 500)))
+	tranches = np.minimum((probas * nb_tranches).astype(int), nb_tranches - 1)
+	table = []
+	for t in range(nb_tranches):
+		dans = tranches == t
+		if dans.any():
+			table.append((t / nb_tranches, (t + 1) / nb_tranches, int(dans.sum()), float(probas[dans].mean()), float(labels[dans].mean())))
+	return table
+
+
+'''
+	@brief	Affiche l'aire ROC, les erreurs au seuil du modèle et le seuil recommandé pour
+	quelques taux de faux positifs cibles.
+'''
+def afficherEvaluation(c, seuil_modele = 0):
+	print(f"Aire sous la courbe ROC : {aireROC(c):.4f}")
+	erreur_spam, erreur_ham, erreur = erreursAuSeuil(c, seuil_modele)
+	print(f"Seuil {seuil_modele:.3f} : erreur SPAM {100 * erreur_spam:.2f} %  erreur HAM {100 * erreur_ham:.2f} %  globale {100 * erreur:.2f} %")
+	for fpr_cible in (0.001, 0.01, 0.05):
+		seuil = seuilPourFpr(c, fpr_cible)
+		erreur_spam, erreur_ham, erreur = erreursAuSeuil(c, seuil)
+		print(f"  FPR <= {100 * fpr_cible:g} % : seuil {seuil:.3f}  SPAM détectés {100 * (1 - erreur_spam):.2f} %  erreur HAM {100 * erreur_ham:.2f} %")
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Courbes ROC / PR et choix du seuil de décision d'un classifieur.")
+	parser.add_argument("classifieur", help="Classifieur de saves/ à évaluer.")
+	parser.add_argument("--base", default="basetest", help="Base de test (sous-dossiers spam/ et ham/).")
+	parser.add_argument("--fpr", type=float, help="Enregistre dans le classifieur le seuil recommandé pour ce taux de faux positifs.")
+	parser.add_argument("--csv", help="Écrit les courbes dans ce fichier CSV.")
+	args = parser.parse_args()
+
+	classifieur = chargerClassifieur(nom=args.classifieur)
+	if classifieur is not None:
+		scores, labels = scoresBase(classifieur, args.base)
+		c = courbes(scores, labels)
+		afficherEvaluation(c, classifieur.get("seuil", 0))
+
+		print("Calibration (P(SPAM | x) prédite -> proportion réelle de SPAM) :")
+		for basse, haute, nombre, moyenne, reelle in calibration(scores, labels):
+			print(f"  [{basse:.1f} ; {haute:.1f}] : {nombre:5d} mails  prédite {moyenne:.3f}  réelle {reelle:.3f}")
+
+		if args.csv:
+			colonnes = ["seuils", "tpr", "fpr", "precision"]
+			np.savetxt(args.csv, np.column_stack([c[k] for k in colonnes]), delimiter=",", header=",".join(colonnes), comments="")
+
+		if args.fpr is not None:
+			classifieur["seuil"] = seuilPourFpr(c, args.fpr)
+			if compacterJournal(classifieur, nom=args.classifieur):
+				print(f"Seuil {classifieur['seuil']:.3f} enregistré dans {args.classifieur}.")
@@ -0,0 +1,242 @@
+import argparse
+import pickle
+import sys
+import time
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 							CLASSIFIEUR SUR FENÊTRE GLISSANTE
+# ======================================================================================
+#
+# Les comptes sont rangés par époque (un jour par défaut) dans un anneau de NB_EPOQUES
+# seaux. Les comptes vivants sont une somme tenue à jour : ajouter un mail au seau courant
+# et faire expirer le seau le plus ancien coûtent chacun une addition ou une soustraction
+# de vecteur, sans jamais réapprendre tout l'historique.
+#
+# Une fenêtre se sauvegarde avec ses seaux et ses sommes (fichier EXTENSION) : on peut
+# la nourrir au fil de l'eau (python fenetre.py apprendre) puis en exporter le classifieur
+# courant dans saves/ pour l'utiliser comme les autres (python fenetre.py exporter).
+
+NB_EPOQUES = 30
+DUREE_EPOQUE = 24 * 3600 # en secondes
+EXTENSION = ".fen"
+ETAT = ("nb_epoques", "duree_epoque", "lecteur", "epoque", "seaux_nspam", "seaux_nham",
+	"seaux_mSpam", "seaux_mHam", "nspam", "nham", "mSpam", "mHam") # Attributs sauvegardés
+
+
+class ClassifieurFenetre:
+	'''
+		@brief	Classifieur ne tenant compte que des mails des nb_epoques dernières époques.
+	'''
+
+	def __init__(self, dictionnaire, nb_epoques = NB_EPOQUES, duree_epoque = DUREE_EPOQUE, instant = None, lecteur = "texte"):
+		verifierLecteur(lecteur)
+		self.dictionnaire = dictionnaire
+		self.nb_epoques = nb_epoques
+		self.duree_epoque = duree_epoque
+		self.lecteur = lecteur
+		self.epoque = self.numeroEpoque(instant)
+
+		m = len(dictionnaire)
+		self.seaux_nspam = np.zeros((nb_epoques, m))
+		self.seaux_nham = np.zeros((nb_epoques, m))
+		self.seaux_mSpam = np.zeros(nb_epoques, dtype=int)
+		self.seaux_mHam = np.zeros(nb_epoques, dtype=int)
+
+		# Sommes vivantes sur toute la fenêtre
+		self.nspam = np.zeros(m)
+		self.nham = np.zeros(m)
+		self.mSpam = 0
+		self.mHam = 0
+
+	'''
+		@brief	Numéro d'époque d'un instant (maintenant par défaut).
+	'''
+	def numeroEpoque(self, instant = None):
+		return int((time.time() if instant is None else instant) // self.duree_epoque)
+
+	'''
+		@brief	Fait expirer le seau le plus ancien : il est soustrait des sommes vivantes puis
+		vidé pour recevoir l'époque suivante.
+	'''
+	def expirer(self):
+		self.epoque += 1
+		i = self.epoque % self.nb_epoques
+
+		self.nspam -= self.seaux_nspam[i]
+		self.nham -= self.seaux_nham[i]
+		self.mSpam -= int(self.seaux_mSpam[i])
+		self.mHam -= int(self.seaux_mHam[i])
+
+		self.seaux_nspam[i] = 0
+		self.seaux_nham[i] = 0
+		self.seaux_mSpam[i] = 0
+		self.seaux_mHam[i] = 0
+
+	'''
+		@brief	Avance la fenêtre jusqu'à l'époque d'un instant donné (maintenant par défaut).
+	'''
+	def avancer(self, instant = None):
+		epoque = self.numeroEpoque(instant)
+
+		# Au-delà d'un tour complet de l'anneau, tous les seaux sont expirés de toute façon
+		if epoque - self.epoque > self.nb_epoques:
+			self.epoque = epoque - self.nb_epoques
+		while self.epoque < epoque:
+			self.expirer()
+
+	'''
+		@brief	Ajoute un mail vectorisé au seau de l'époque courante.
+
+		@param x : Vecteur booléen des mots du mail.
+		@param isSpam : Classe du mail.
+		@param instant : Date de réception du mail (maintenant par défaut). Un mail plus ancien
+		que l'époque courante est compté dans l'époque courante.
+	'''
+	def ajouter(self, x, isSpam, instant = None):
+		self.avancer(instant)
+		i = self.epoque % self.nb_epoques
+
+		if isSpam:
+			self.seaux_nspam[i] += x
+			self.nspam += x
+			self.seaux_mSpam[i] += 1
+			self.mSpam += 1
+		else:
+			self.seaux_nham[i] += x
+			self.nham += x
+			self.seaux_mHam[i] += 1
+			self.mHam += 1
+
+	'''
+		@brief	Lit un mail et l'ajoute au seau de l'époque courante.
+	'''
+	def apprendreFichier(self, chemin_mail, isSpam, instant = None):
+		self.ajouter(lireMail(chemin_mail, self.dictionnaire, self.lecteur), isSpam, instant)
+
+	'''
+		@brief	Vérifie que les sommes vivantes sont égales aux comptes recalculés à partir
+		des seaux (les comptes étant entiers, l'égalité est exacte).
+
+		@return True si les sommes sont cohérentes.
+	'''
+	def verifier(self):
+		return (np.array_equal(self.nspam, self.seaux_nspam.sum(axis=0))
+			and np.array_equal(self.nham, self.seaux_nham.sum(axis=0))
+			and self.mSpam == int(self.seaux_mSpam.sum())
+			and self.mHam == int(self.seaux_mHam.sum()))
+
+	'''
+		@brief	Renvoie le classifieur (dictionnaire) correspondant à la fenêtre courante,
+		utilisable par prediction, testClassifieur, etc.
+
+		@return Le classifieur, None si la fenêtre ne contient aucun mail.
+	'''
+	def classifieur(self):
+		if self.mSpam + self.mHam == 0:
+			print("La fenêtre ne contient aucun mail.")
+			return None
+		return classifieurDepuisComptes(self.dictionnaire, self.nspam.copy(), self.mSpam, self.nham.copy(), self.mHam, self.lecteur)
+
+
+'''
+	@brief	Sauvegarde une fenêtre : époque courante, seaux et sommes vivantes (fichier
+	temporaire puis remplacement).
+
+	@param nom : Nom du fichier, avec l'extension EXTENSION.
+
+	@return 1 en cas de succès, None sinon.
+'''
+def sauvegarderFenetre(fenetre, dossier = "saves", nom = "fenetre" + EXTENSION):
+	os.makedirs(dossier, exist_ok=True)
+	chemin = os.path.join(dossier, nom)
+	etat = {cle: getattr(fenetre, cle) for cle in ETAT}
+	etat["dictionnaire"] = list(fenetre.dictionnaire)
+	try:
+		with open(chemin + ".tmp", "wb") as f:
+			pickle.dump(etat, f)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(chemin + ".tmp", chemin)
+	except OSError as ex:
+		print(f"La fenêtre n'a pas pu être sauvegardée : {ex}")
+		return None
+	return 1
+
+
+'''
+	@brief	Charge une fenêtre sauvegardée par sauvegarderFenetre.
+
+	@return La fenêtre, None si le fichier n'existe pas ou n'est pas une fenêtre.
+'''
+def chargerFenetre(dossier = "saves", nom = "fenetre" + EXTENSION):
+	chemin = os.path.join(dossier, nom)
+	if not os.path.exists(chemin):
+		print(f"Erreur -> Aucun fichier de ce type : {nom}")
+		return None
+	with open(chemin, "rb") as f:
+		etat = pickle.load(f)
+	if not isinstance(etat, dict) or "seaux_nspam" not in etat:
+		print(f"Erreur -> {nom} n'est pas une fenêtre glissante.")
+		return None
+
+	fenetre = ClassifieurFenetre.__new__(ClassifieurFenetre)
+	fenetre.dictionnaire = etat["dictionnaire"]
+	for cle in ETAT:
+		setattr(fenetre, cle, etat[cle])
+	return fenetre
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Classifieur sur fenêtre glissante.")
+	parser.add_argument("--nom", default="fenetre" + EXTENSION, help="Nom de la fenêtre dans saves/.")
+	commandes = parser.add_subparsers(dest="commande", required=True)
+
+	apprendre = commandes.add_parser("apprendre", help="Ajoute des mails à la fenêtre (créée si besoin), datés de leur dernière modification.")
+	apprendre.add_argument("--spams", help="Dossier de SPAM à ajouter.")
+	apprendre.add_argument("--hams", help="Dossier de HAM à ajouter.")
+	apprendre.add_argument("--maintenant", action="store_true", help="Date les mails de maintenant plutôt que de leur dernière modification.")
+	apprendre.add_argument("--dico", default="dics/dictionnaire1000en.txt", help="Dictionnaire d'une nouvelle fenêtre.")
+	apprendre.add_argument("--lecteur", choices=LECTEURS, default="texte", help="Lecteur des mails d'une nouvelle fenêtre.")
+	apprendre.add_argument("--epoques", type=int, default=NB_EPOQUES, help="Nombre d'époques d'une nouvelle fenêtre.")
+	apprendre.add_argument("--duree", type=float, default=DUREE_EPOQUE, help="Durée d'une époque (secondes) d'une nouvelle fenêtre.")
+
+	exporter = commandes.add_parser("exporter", help="Sauvegarde le classifieur de la fenêtre à l'instant présent dans saves/.")
+	exporter.add_argument("classifieur", help="Nom du classifieur sauvegardé (exemple : fenetre.pkl).")
+
+	commandes.add_parser("verifier", help="Compare les sommes vivantes aux comptes recalculés à partir des seaux.")
+	args = parser.parse_args()
+
+	if args.commande == "apprendre":
+		if os.path.exists(os.path.join("saves", args.nom)):
+			fenetre = chargerFenetre(nom=args.nom)
+		else:
+			fenetre = ClassifieurFenetre(charge_dico(args.dico), args.epoques, args.duree, lecteur=args.lecteur)
+		if fenetre is None:
+			sys.exit(1)
+
+		mails = []
+		for dossier, isSpam in ((args.spams, True), (args.hams, False)):
+			if dossier:
+				mails += [(os.path.join(dossier, f), isSpam) for f in sorted(os.listdir(dossier))]
+		# Les mails sont ajoutés dans l'ordre de leurs dates pour tomber dans leur époque
+		instants = [None if args.maintenant else os.path.getmtime(chemin) for chemin, _ in mails]
+		for (chemin, isSpam), instant in sorted(zip(mails, instants), key=lambda m: m[1] or 0):
+			fenetre.apprendreFichier(chemin, isSpam, instant)
+
+		if sauvegarderFenetre(fenetre, nom=args.nom):
+			print(f"{len(mails)} mails ajoutés. Fenêtre : {fenetre.mSpam} SPAM, {fenetre.mHam} HAM.")
+	else:
+		fenetre = chargerFenetre(nom=args.nom)
+		if fenetre is None:
+			sys.exit(1)
+		if args.commande == "verifier":
+			coherent = fenetre.verifier()
+			print(f"Sommes vivantes {'cohérentes' if coherent else 'INCOHÉRENTES'} avec les seaux ({fenetre.mSpam} SPAM, {fenetre.mHam} HAM).")
+			sys.exit(0 if coherent else 1)
+
+		fenetre.avancer()
+		classifieur = fenetre.classifieur()
+		if classifieur is not None and sauvegarderClassifieur(classifieur, nom=args.classifieur):
+			print(f"Classifieur de la fenêtre sauvegardé sous {args.classifieur}.")
@@ -0,0 +1,161 @@
+import argparse
+import io
+import json
+import sys
+
+from bayes_classifier import *
+from cache_verdicts import CacheVerdicts, empreinteTexte
+
+# ======================================================================================
+# 						SCORE EN FLUX : ENTRÉE STANDARD -> SORTIE STANDARD
+# ======================================================================================
+#
+# Lit des mails sur l'entrée standard, les classe par lots avec la prédiction vectorisée
+# et écrit un verdict NDJSON par mail sur la sortie standard, dans l'ordre d'entrée.
+# La mémoire utilisée est bornée par la taille d'un lot.
+#
+# Formats d'entrée :
+#	ndjson : une ligne JSON par mail, {"id": ..., "texte": "..."}
+#	brut   : pour chaque mail, sa taille en octets sur une ligne puis le mail brut
+#
+# Sortie : {"id": ..., "spam": true/false, "p_spam": ..., "score": ...} (ou {"id": ..., "erreur": ...})
+#
+# Avec --cache, les verdicts sont gardés par empreinte du contenu (voir cache_verdicts.py)
+# le temps du flux : les copies d'un même mail (campagnes de SPAM) ne sont classées qu'une fois.
+
+TAILLE_LOT = 256
+
+
+'''
+	@brief	Lit des enregistrements NDJSON.
+
+	@return Générateur de couples (id, texte) ; texte vaut None et id contient le message
+	d'erreur si la ligne est invalide.
+'''
+def lireNdjson(entree):
+	for numero, ligne in enumerate(entree):
+		if not ligne.strip():
+			continue
+		try:
+			enregistrement = json.loads(ligne)
+			yield enregistrement.get("id", numero), str(enregistrement["texte"])
+		except (ValueError, KeyError, AttributeError) as ex:
+			yield {"ligne": numero, "erreur": f"enregistrement invalide : {ex}"}, None
+
+
+'''
+	@brief	Lit des mails bruts préfixés par leur taille.
+
+	@return Générateur de couples (numéro, contenu en octets), lu ensuite par le lecteur du modèle.
+'''
+def lireBrut(entree):
+	numero = 0
+	while True:
+		entete = entree.readline()
+		if not entete:
+			return
+		if not entete.strip():
+			continue
+		try:
+			taille = int(entete)
+		except ValueError:
+			yield {"ligne": numero, "erreur": f"taille invalide : {entete.strip()!r}"}, None
+			return
+		yield numero, entree.read(taille)
+		numero += 1
+
+
+'''
+	@brief	Découpe un itérable en lots de taille bornée.
+'''
+def lots(iterable, taille):
+	lot = []
+	for element in iterable:
+		lot.append(element)
+		if len(lot) == taille:
+			yield lot
+			lot = []
+	if lot:
+		yield lot
+
+
+'''
+	@brief	Classe un flux de mails par lots et écrit les verdicts NDJSON.
+
+	@param enregistrements : Itérable de couples (id, texte).
+	@param classifieur : Classifieur.
+	@param sortie : Flux texte de sortie.
+	@param taille_lot : Nombre de mails classés ensemble.
+	@param cache : CacheVerdicts propre au flux, dont les verdicts sont des triplets
+	(spam, p_spam, score) (None : pas de cache).
+'''
+def scorerFlux(enregistrements, classifieur, sortie, taille_lot = TAILLE_LOT, cache = None):
+	dictionnaire = classifieur["dictionnaire"]
+	lecteur = lecteurClassifieur(classifieur)
+	biais, poids = poidsClassifieur(classifieur) # Le modèle ne change pas pendant le flux
+	seuil = classifieur.get("seuil", 0)
+
+	index = None # Vocabulaire compact : recherche par lot (voir vecteurMots)
+	if not hasattr(dictionnaire, "indices"):
+		index = {}
+		for i, mot in enumerate(dictionnaire):
+			index.setdefault(mot, i) # Première occurrence, comme dans vecteurMots
+	if cache is not None:
+		cache.verifierModele(classifieur)
+
+	for lot in lots(enregistrements, taille_lot):
+		lignes, colonnes = [], []
+		verdicts = {} # Ligne -> verdict trouvé dans le cache
+		cles = {} # Ligne -> empreinte des mails à classer
+		for ligne, (_, texte) in enumerate(lot):
+			if texte is None:
+				continue
+			if cache is not None:
+				cles[ligne] = empreinteTexte(texte, lecteur)
+				verdicts[ligne] = cache.chercher(cles[ligne])
+				if verdicts[ligne] is not None:
+					continue
+			mots = set(extraireMots(texteContenu(texte, lecteur)))
+			presents = dictionnaire.indices(mots).tolist() if index is None else [index[mot] for mot in mots if mot in index]
+			lignes += [ligne] * len(presents)
+			colonnes += presents
+
+		isSpam, Pspam_x, scores = predictionLot(np.array(lignes, dtype=np.int64), np.array(colonnes, dtype=np.int64), len(lot), biais, poids, seuil)
+
+		for ligne, (identifiant, texte) in enumerate(lot):
+			if texte is None:
+				sortie.write(json.dumps(identifiant) + "\n")
+				continue
+			verdict = verdicts.get(ligne)
+			if verdict is None:
+				verdict = (bool(isSpam[ligne]), float(Pspam_x[ligne]), float(scores[ligne]))
+				if cache is not None:
+					cache.ranger(cles[ligne], verdict)
+			sortie.write(json.dumps({"id": identifiant, "spam": verdict[0], "p_spam": verdict[1], "score": verdict[2]}) + "\n")
+		sortie.flush()
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Classe des mails lus sur l'entrée standard et écrit les verdicts en NDJSON.")
+	parser.add_argument("classifieur", help="Classifieur de saves/ à utiliser.")
+	parser.add_argument("--format", choices=("ndjson", "brut"), default="ndjson", help="Format d'entrée.")
+	parser.add_argument("--lot", type=int, default=TAILLE_LOT, help="Nombre de mails classés ensemble.")
+	parser.add_argument("--cache", action="store_true", help="Ne classe qu'une fois les mails de contenu identique (statistiques sur la sortie d'erreur).")
+	args = parser.parse_args()
+
+	classifieur = chargerClassifieur(nom=args.classifieur)
+	if classifieur is None:
+		sys.exit(1)
+
+	if args.format == "ndjson":
+		enregistrements = lireNdjson(io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", errors="ignore"))
+	else:
+		enregistrements = lireBrut(sys.stdin.buffer)
+
+	cache = CacheVerdicts() if args.cache else None
+	try:
+		scorerFlux(enregistrements, classifieur, sys.stdout, args.lot, cache)
+	except BrokenPipeError:
+		sys.exit(0)
+	if cache is not None:
+		print(json.dumps(cache.statistiques()), file=sys.stderr)
@@ -1,11 +1,15 @@
 import numpy as np
 import os
-import random
 import shutil
-import math
 
 from pathlib import Path
 from bayes_classifier import *
+from journal_maj import *
+from evaluation import courbes, scoresBase, afficherEvaluation, seuilPourFpr
+from deduplication import creerClassifieurDedup, splitParGrappes
+from reprise import entrainerAvecReprise
+from comparaison import comparerClassifieurs
+from decoupage import decouperFlux, sourceDossiers
 
 dossier_dicos = "dics"
 
@@ -18,34 +22,46 @@ def menu():
     print("5. Supprimer un classifieur")
     print("6. Mettre à jour le classifieur")
     print("7. Splitter un dataset (SPAM / HAM)")
-    print("8. Quitter")
+    print("8. Fusionner des classifieurs sauvegardés")
+    print("9. Choisir le seuil de décision (courbes ROC)")
+    print("10. Comparer des classifieurs sauvegardés")
+    print("11. Quitter")
     return input("Votre choix : ")
 
 
-def lister_classifieurs(dossier="saves"):
+def lister_classifieurs(dossier="saves", motif=""):
     import os
     if not os.path.exists(dossier):
         print("Le dossier de sauvegarde n'existe pas.")
         return []
-    fichiers = [f for f in os.listdir(dossier) if f.endswith(".pkl")]
+    # Les métadonnées viennent du catalogue : aucun modèle n'est chargé
+    catalogue = lireCatalogue(dossier)
+    fichiers = filtrerCatalogue(catalogue, motif)
     if not fichiers:
         print("Aucun classifieur n'a été trouvé.")
     else:
+        print(f"    {'nom':<30} {'mots':>7} {'mSpam':>7} {'mHam':>7} {'seuil':>7} {'erreur':>8}  sauvegarde")
         for idx, nom in enumerate(fichiers):
-            print(f"{idx+1}. {nom}")
+            meta = catalogue[nom]
+            erreur = "-" if meta["erreur_test"] is None else f"{meta['erreur_test']:.2f} %"
+            print(f"{idx+1:>2}. {nom:<30} {meta['mots']:>7} {meta['mSpam']:>7} {meta['mHam']:>7} {meta['seuil']:>7.2f} {erreur:>8}  {meta['sauvegarde']}")
     return fichiers
 
 
 def selectionner_classifieur():
-    fichiers = lister_classifieurs()
+    motif = input("Filtrer par nom (Entrée pour tout afficher) : ").strip()
+    fichiers = lister_classifieurs(motif=motif)
     if not fichiers:
         return None
     choix = input("Sélectionnez le numéro du classifieur à charger : ")
     try:
         idx = int(choix) - 1
         nom = fichiers[idx]
-        # Charger le classifieur
+        # Charger le classifieur (son journal de mises à jour est rejoué)
         classifieur = chargerClassifieur(dossier="saves", nom=nom)
+        if classifieur is None:
+            return None
+        classifieur["nom"] = nom
         print(f"Classifieur {nom} chargé.")
         return classifieur
     except (ValueError, IndexError):
@@ -101,32 +117,30 @@ def creer_classifieur():
         print("Aucun dictionnaire trouvé dans le dossier. Utilisation du dictionnaire par défaut.")
         dictionnaire = charge_dico("dictionnaire1000en.txt")
     
-    # Apprentissage sur les spams
-    fichiers_spams = os.listdir(dossier_spams)
-    print("Apprentissage des SPAM...")
-    bspam = apprendBinomial(dossier_spams, fichiers_spams, dictionnaire)
-    mSpam = len(fichiers_spams)
-
-    # Apprentissage sur les hams
-    fichiers_hams = os.listdir(dossier_hams)
-    print("Apprentissage des HAM...")
-    bham = apprendBinomial(dossier_hams, fichiers_hams, dictionnaire)
-    mHam = len(fichiers_hams)
-
-    total = mSpam + mHam
-    Pspam = mSpam / total
-    Pham = mHam / total
-
-    # Constitution du classifieur sous forme de dictionnaire
-    classifieur = {
-        "Pspam": Pspam,
-        "Pham": Pham,
-        "bspam": bspam,
-        "bham": bham,
-        "dictionnaire": dictionnaire,
-        "mSpam": mSpam,
-        "mHam": mHam
-    }
+    # Lecteur des mails, noté dans le classifieur et réutilisé pour le tester et classer
+    lecteur = "mime" if input("Analyser la structure MIME des mails (parties texte décodées, pièces jointes ignorées) ? (tapez 'y' ou 'n') : ").strip().lower() == 'y' else "texte"
+
+    # Apprentissage dédupliqué : chaque groupe de quasi-doublons ne compte qu'une fois
+    dedup = input("Regrouper les quasi-doublons (campagnes de SPAM) ? (tapez 'y' ou 'n') : ").strip().lower() == 'y'
+    if dedup:
+        mode = input("Garder un mail par groupe (tapez 's') ou tous avec un poids réduit (tapez 'p') ? ").strip().lower()
+        print("Apprentissage des SPAM et des HAM sans les quasi-doublons...")
+        classifieur = creerClassifieurDedup(dossier_spams, dossier_hams, dictionnaire, "ponderer" if mode == 'p' else "supprimer", lecteur=lecteur)
+        print("Nouveau classifieur créé.")
+        return classifieur
+
+    # Apprentissage sur les spams et les hams, avec points de reprise réguliers
+    os.makedirs("saves", exist_ok=True)
+    chemin_reprise = os.path.join("saves", "creation.reprise")
+    reprendre = False
+    if os.path.exists(chemin_reprise):
+        reprendre = input("Un apprentissage interrompu a été trouvé. Le reprendre ? (tapez 'y' ou 'n') : ").strip().lower() == 'y'
+
+    print("Apprentissage des SPAM et des HAM...")
+    try:
+        classifieur = entrainerAvecReprise(dossier_spams, dossier_hams, dictionnaire, chemin_reprise, reprendre, lecteur=lecteur)
+    except KeyboardInterrupt:
+        return None
     print("Nouveau classifieur créé.")
     return classifieur
 
@@ -137,7 +151,9 @@ def sauvegarder_classifieur_interface(classifieur):
 		return
 	nom = input("Entrez le nom sous lequel sauvegarder le classifieur (exemple: monClassifieur) : ")
 	nom = nom + ".pkl"
-	if sauvegarderClassifieur(classifieur, dossier="saves", nom=nom):
+	# La sauvegarde complète vide le journal des mises à jour, devenu inutile
+	if compacterJournal(classifieur, dossier="saves", nom=nom):
+		classifieur["nom"] = nom
 		print(f"Classifieur sauvegardé sous {nom}.")
 	else:
 		print("Échec de la sauvegarde.")
@@ -167,11 +183,14 @@ def lancer_test(classifieur):
 	mHam_test = len(fichiers_hams_test)
 	total_test = mSpam_test + mHam_test
 
+	# L'arrêt anticipé s'arrête dès que les mots restants ne peuvent plus changer la décision
+	anticipe = input("Utiliser la prédiction avec arrêt anticipé ? (tapez 'y' ou 'n') : ").strip().lower() == 'y'
+
 	# Test sur spam et ham
 	print("\nTest sur les SPAM:")
-	spam_err_rate = testClassifieur(dossier_spams_test, True, classifieur) * 100
+	spam_err_rate = testClassifieur(dossier_spams_test, True, classifieur, anticipe) * 100
 	print("\nTest sur les HAM:")
-	ham_err_rate = testClassifieur(dossier_hams_test, False, classifieur) * 100
+	ham_err_rate = testClassifieur(dossier_hams_test, False, classifieur, anticipe) * 100
 
 	total_err_rate = (((spam_err_rate * mSpam_test) + (ham_err_rate * mHam_test)) / total_test)
 	print("\n===== RÉSULTATS DU TEST =====")
@@ -179,6 +198,10 @@ def lancer_test(classifieur):
 	print("Erreur de test sur ", mHam_test, " HAM : ", ham_err_rate, " %")
 	print("Erreur de test globale sur ", total_test, " mails : ", total_err_rate, " %")
 
+	# Sur la base par défaut, l'erreur est notée dans le catalogue des modèles
+	if dossier_spams_test == "basetest/spam" and dossier_hams_test == "basetest/ham" and classifieur.get("nom"):
+		noterErreurTest(classifieur, total_err_rate)
+
 
 def supprimer_classifieur():
     fichiers = lister_classifieurs()
@@ -190,31 +213,51 @@ def supprimer_classifieur():
         nom = fichiers[idx]
         chemin = os.path.join("saves", nom)
         os.remove(chemin)
+        for annexe in [cheminJournal("saves", nom)] + vocabulairesSauvegarde("saves", nom):
+            if os.path.exists(annexe):
+                os.remove(annexe)
+        retirerDuCatalogue("saves", nom)
         print(f"Classifieur {nom} supprimé.")
     except Exception as e:
         print("Erreur lors de la suppression :", e)
 
 
 def maj_classifieur(classifieur):
+    if classifieur is None:
+        print("Aucun classifieur n'est chargé pour la mise à jour.")
+        return
+    if estElague(classifieur):
+        print("Ce classifieur est élagué : il ne peut pas être mis à jour. Mettez à jour le modèle complet puis élaguez-le de nouveau.")
+        return classifieur
     chemin = input("Veuillez renseigner le chemin absolu vers le fichier ou dossier de mails : ").strip()
     isSpam = input("Les mails sont-ils des spams ? (tapez 'y' ou 'n') : ").strip().lower()
     spam_flag = isSpam == 'y'
 
 	# Fichier unique
+    majs = []
     if os.path.isfile(chemin):
-        return updateClassifieur(chemin, spam_flag, classifieur)
+        resultat = apprendreMail(chemin, spam_flag, classifieur, majs=majs)
+        if resultat == "ignore":
+            print("Ce mail a déjà été appris avec cette étiquette.")
+        elif resultat is not None:
+            print("Le classifieur a été mis à jour avec le nouveau mail : ", chemin)
     
-	# Dossier contenant plusieurs fichiers
+	# Dossier contenant plusieurs fichiers : seuls les mails absents du journal sont appris
     elif os.path.isdir(chemin):
-        for nom_fichier in os.listdir(chemin):
-            chemin_fichier = os.path.join(chemin, nom_fichier)
-            if os.path.isfile(chemin_fichier):  # éviter les sous-dossiers
-                updateClassifieur(chemin_fichier, spam_flag, classifieur)
-        return classifieur
+        bilan = majDossierClassifieur(chemin, spam_flag, classifieur, majs)
+        print(f"{bilan['nouveau']} nouveau(x) mail(s) appris, {bilan['inverse']} étiquette(s) corrigée(s), {bilan['ignore']} mail(s) déjà connu(s).")
     else:
         print("Chemin invalide. Veuillez fournir un fichier ou un dossier existant.")
         return classifieur
 
+    # Un classifieur sauvegardé persiste ses mises à jour dans son journal
+    if classifieur.get("nom"):
+        if persisterMajs(classifieur, majs, dossier="saves", nom=classifieur["nom"]):
+            print(f"Journal compacté dans {classifieur['nom']}.")
+        else:
+            print(f"Mises à jour enregistrées dans le journal de {classifieur['nom']}.")
+    return classifieur
+
 
 def split_dataset_interface():
     print("\n=== SPLIT DU DATASET ===")
@@ -236,6 +279,25 @@ def split_dataset_interface():
         print("Entrée invalide.")
         return
 
+    # Les quasi-doublons (campagnes de spam) restent ensemble, tous en train ou tous en test
+    regrouper = input("Garder les quasi-doublons dans le même ensemble ? (tapez 'y' ou 'n') : ").strip().lower() == 'y'
+
+    # La graine est affichée et enregistrée : le même découpage peut être refait
+    try:
+        graine = int(input("Graine du découpage (par défaut 0) : ").strip() or 0)
+    except ValueError:
+        print("Entrée invalide.")
+        return
+
+    if not regrouper:
+        # Découpage en flux, stable d'une exécution à l'autre (voir decoupage.py)
+        comptes = decouperFlux(sourceDossiers({"spam": spam_dir, "ham": ham_dir}), output_dir, {"spam": spam_ratio, "ham": ham_ratio}, graine)
+        for label in ['spam', 'ham']:
+            n_train, n_test = comptes[('train', label)], comptes[('test', label)]
+            print(f"{label.upper()} : {n_train} pour train, {n_test} pour test (total : {n_train + n_test})")
+        print(f"\nSplit terminé (graine {graine}). Résultat enregistré dans : {Path(output_dir).resolve()}")
+        return
+
     # Crée les dossiers de sortie
     for subset in ['train', 'test']:
         for label in ['spam', 'ham']:
@@ -243,15 +305,11 @@ def split_dataset_interface():
 
     # Fonction de split et copie
     def split_and_copy(source_dir, label, ratio):
-        fichiers = [f for f in os.listdir(source_dir) if os.path.isfile(os.path.join(source_dir, f))]
-        random.shuffle(fichiers)
-
-        n_total = len(fichiers)
-        n_train = math.floor(ratio * n_total)
-        n_test = n_total - n_train
+        train_files, test_files = splitParGrappes(source_dir, ratio, graine)
 
-        train_files = fichiers[:n_train]
-        test_files = fichiers[n_train:]
+        n_train = len(train_files)
+        n_test = len(test_files)
+        n_total = n_train + n_test
 
         for f in train_files:
             shutil.copy2(os.path.join(source_dir, f), os.path.join(output_dir, 'train', label, f))
@@ -264,4 +322,63 @@ def split_dataset_interface():
     split_and_copy(spam_dir, "spam", spam_ratio)
     split_and_copy(ham_dir, "ham", ham_ratio)
 
-    print(f"\nSplit terminé. Résultat enregistré dans : {Path(output_dir).resolve()}")
\ No newline at end of file
+    print(f"\nSplit terminé (graine {graine}). Résultat enregistré dans : {Path(output_dir).resolve()}")
+
+def fusionner_classifieurs_interface():
+    fichiers = lister_classifieurs()
+    if not fichiers:
+        return None
+    choix = input("Numéros des classifieurs à fusionner (séparés par des espaces) : ")
+    try:
+        noms = [fichiers[int(c) - 1] for c in choix.split()]
+    except (ValueError, IndexError):
+        print("Choix invalide.")
+        return None
+
+    classifieurs = [chargerClassifieur(dossier="saves", nom=nom) for nom in noms]
+    if None in classifieurs:
+        return None
+    classifieur = fusionnerClassifieurs(classifieurs)
+    if classifieur is not None:
+        print(f"Classifieurs {', '.join(noms)} fusionnés.")
+    return classifieur
+
+
+def choisir_seuil_interface(classifieur):
+    if classifieur is None:
+        print("Aucun classifieur n'est chargé.")
+        return
+    base = input("Base de validation (dossier contenant spam/ et ham/, par défaut 'basetest') : ").strip() or "basetest"
+    if not os.path.isdir(os.path.join(base, "spam")) or not os.path.isdir(os.path.join(base, "ham")):
+        print("Base introuvable.")
+        return
+
+    # Les scores sont calculés une seule fois, tous les seuils sont lus sur les courbes
+    c = courbes(*scoresBase(classifieur, base))
+    afficherEvaluation(c, classifieur.get("seuil", 0))
+    try:
+        fpr_cible = float(input("Taux de faux positifs cible (ex: 0.001 pour 0,1 %) : "))
+    except ValueError:
+        print("Entrée invalide.")
+        return
+    classifieur["seuil"] = seuilPourFpr(c, fpr_cible)
+    print(f"Seuil de décision fixé à {classifieur['seuil']:.3f} (à sauvegarder avec le classifieur).")
+
+
+def comparer_classifieurs_interface():
+    fichiers = lister_classifieurs()
+    if not fichiers:
+        return
+    choix = input("Numéros des classifieurs à comparer (séparés par des espaces, Entrée pour tous) : ").strip()
+    try:
+        noms = [fichiers[int(c) - 1] for c in choix.split()] if choix else fichiers
+    except (ValueError, IndexError):
+        print("Choix invalide.")
+        return
+    base = input("Base de test (dossier contenant spam/ et ham/, par défaut 'basetest') : ").strip() or "basetest"
+    if not os.path.isdir(os.path.join(base, "spam")) or not os.path.isdir(os.path.join(base, "ham")):
+        print("Base introuvable.")
+        return
+
+    # La base n'est lue et découpée qu'une fois pour tous les classifieurs
+    comparerClassifieurs(noms, base)
@@ -0,0 +1,107 @@
+import json
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 							JOURNAL DES MISES À JOUR (WRITE-AHEAD LOG)
+# ======================================================================================
+#
+# Chaque classifieur sauvegardé saves/<nom> peut avoir un journal saves/<nom>.log où sont
+# ajoutées, une ligne JSON par mail, les mises à jour préparées par apprendreMail (voir
+# appliquerMaj). Persister une mise à jour coûte donc O(mots du mail) au lieu de
+# réécrire tout le classifieur. Chaque ligne porte un numéro de séquence ; la sauvegarde
+# retient le dernier numéro qu'elle contient ("seq_journal"), ce qui permet de rejouer le
+# journal sans rien appliquer deux fois, même après un arrêt pendant un compactage.
+#
+# Chaque ligne porte aussi l'identifiant de la sauvegarde à laquelle elle s'ajoute
+# ("id_sauvegarde", tiré à chaque sauvegarde). Une nouvelle sauvegarde, même d'un tout
+# autre classifieur sous le même nom, rend donc caduques les lignes restées dans le
+# journal : un arrêt entre l'écriture de la sauvegarde et la remise à zéro du journal ne
+# fait jamais rejouer des lignes d'un autre classifieur.
+#
+# La relecture du journal (cheminJournal, lireJournal) est faite par chargerClassifieur
+# lui-même : tout chargement d'un classifieur sauvegardé le rend à jour.
+
+
+'''
+	@brief	Retire la fin d'une ligne écrite partiellement lors d'un arrêt brutal. Une telle
+	ligne n'a jamais été confirmée et peut être ignorée.
+
+	@param f : Journal ouvert en lecture / écriture binaire.
+'''
+def reparerJournal(f):
+	f.seek(0, os.SEEK_END)
+	if f.tell() == 0:
+		return
+	f.seek(-1, os.SEEK_END)
+	if f.read(1) == b"\n":
+		return
+
+	f.seek(0)
+	contenu = f.read()
+	f.truncate(contenu.rfind(b"\n") + 1)
+
+
+'''
+	@brief	Ajoute des mises à jour déjà appliquées au classifieur à la fin de son journal.
+	Elles sont confirmées (écrites sur disque) au retour de la fonction.
+
+	@param classifieur : Classifieur auquel les mises à jour ont été appliquées.
+	@param majs : Mises à jour préparées par apprendreMail / majDossierClassifieur.
+	@param dossier : Dossier de sauvegarde du classifieur.
+	@param nom : Nom du fichier de sauvegarde du classifieur.
+'''
+def journaliser(classifieur, majs, dossier = "saves", nom = "classifieur.pkl"):
+	if not majs:
+		return
+
+	seq = classifieur.get("seq_journal", 0)
+	lignes = []
+	for maj in majs:
+		seq += 1
+		lignes.append(json.dumps(dict(maj, seq=seq, sauvegarde=classifieur.get("id_sauvegarde"))) + "\n")
+
+	chemin = cheminJournal(dossier, nom)
+	with open(chemin, "ab+") as f:
+		reparerJournal(f)
+		f.seek(0, os.SEEK_END)
+		f.write("".join(lignes).encode())
+		f.flush()
+		os.fsync(f.fileno())
+
+	classifieur["seq_journal"] = seq
+
+
+'''
+	@brief	Compacte le journal : écrit une nouvelle sauvegarde complète du classifieur puis
+	vide le journal.
+
+	@return 1 en cas de succès, None sinon.
+'''
+def compacterJournal(classifieur, dossier = "saves", nom = "classifieur.pkl"):
+	if not sauvegarderClassifieur(classifieur, dossier, nom):
+		return None
+
+	# Un arrêt avant cette ligne laisse un journal dont les lignes portent l'identifiant de
+	# l'ancienne sauvegarde : elles seront ignorées au prochain chargement.
+	chemin = cheminJournal(dossier, nom)
+	if os.path.exists(chemin):
+		os.truncate(chemin, 0)
+	return 1
+
+
+'''
+	@brief	Journalise des mises à jour puis compacte le journal s'il devient plus gros que
+	la sauvegarde elle-même.
+
+	@return 1 si le journal a été compacté, 0 sinon.
+'''
+def persisterMajs(classifieur, majs, dossier = "saves", nom = "classifieur.pkl"):
+	journaliser(classifieur, majs, dossier, nom)
+
+	chemin_sauvegarde = os.path.join(dossier, nom)
+	chemin = cheminJournal(dossier, nom)
+	if os.path.exists(chemin) and (not os.path.exists(chemin_sauvegarde) or os.path.getsize(chemin) > os.path.getsize(chemin_sauvegarde)):
+		compacterJournal(classifieur, dossier, nom)
+		return 1
+	return 0
@@ -0,0 +1,89 @@
+import email
+import html
+import re
+
+# ======================================================================================
+# 								LECTURE MIME DES MAILS
+# ======================================================================================
+#
+# lireMail lit et analyse tout le fichier, pièces jointes encodées et balises HTML
+# comprises. Ce lecteur analyse la structure MIME, ne décode que les parties texte
+# (quoted-printable, base64), retire les balises HTML, ignore les parties binaires et
+# borne le nombre d'octets lus et analysés par mail.
+#
+# Un classifieur appris avec ce lecteur le note (classifieur["lecteur"] = "mime", voir
+# lireMail) et tous ses chemins de test et de classement l'utilisent. Le module n'importe
+# pas NumPy, pour que score.py puisse s'en servir sans alourdir son démarrage.
+
+MAX_OCTETS_LUS = 1024 * 1024		# Octets lus sur le disque par mail
+MAX_OCTETS_TEXTE = 100 * 1024		# Octets de texte découpés en mots par mail
+ENTETES = None						# En-têtes dont le texte est conservé (None : tous)
+
+
+'''
+	@brief	Retire les balises, scripts et styles d'un texte HTML.
+
+	@param texte : Texte HTML.
+
+	@return Le texte sans balises.
+'''
+def retirerHtml(texte):
+	texte = re.sub(r'(?is)<(script|style)\b.*?</\1\s*>', ' ', texte)
+	texte = re.sub(r'(?s)<!--.*?-->', ' ', texte)
+	texte = re.sub(r'(?s)<[^>]*>', ' ', texte)
+	return html.unescape(texte)
+
+
+'''
+	@brief	Extrait le texte utile d'un mail brut : en-têtes retenus et parties text/plain ou
+	text/html décodées, hors pièces jointes.
+
+	@param brut : Contenu du mail en octets.
+	@param max_octets_texte : Nombre maximal de caractères de texte renvoyés.
+
+	@return Texte du mail en lowercase.
+'''
+def texteMime(brut, max_octets_texte = MAX_OCTETS_TEXTE):
+	message = email.message_from_bytes(brut)
+	if ENTETES is None:
+		morceaux = [str(valeur) for valeur in message.values()]
+	else:
+		morceaux = [str(message.get(entete, "")) for entete in ENTETES]
+	reste = max_octets_texte
+
+	for partie in message.walk():
+		if reste <= 0:
+			break
+		if partie.is_multipart() or partie.get_content_maintype() != "text":
+			continue
+		if partie.get_content_disposition() == "attachment":
+			continue
+
+		contenu = partie.get_payload(decode=True) or b""
+		try:
+			texte = contenu.decode(partie.get_content_charset() or "utf-8", errors="ignore")
+		except LookupError: # Jeu de caractères inconnu
+			texte = contenu.decode("utf-8", errors="ignore")
+
+		if partie.get_content_subtype() == "html":
+			texte = retirerHtml(texte)
+
+		morceaux.append(texte[:reste])
+		reste -= len(morceaux[-1])
+
+	return " ".join(morceaux).lower()
+
+
+'''
+	@brief	Extrait le texte utile d'un fichier de mail (voir texteMime).
+
+	@param fichier : Chemin du mail.
+	@param max_octets_lus : Nombre maximal d'octets lus dans le fichier.
+	@param max_octets_texte : Nombre maximal de caractères de texte renvoyés.
+
+	@return Texte du mail en lowercase.
+'''
+def texteMail(fichier, max_octets_lus = MAX_OCTETS_LUS, max_octets_texte = MAX_OCTETS_TEXTE):
+	with open(fichier, "rb") as file:
+		return texteMime(file.read(max_octets_lus), max_octets_texte)
+
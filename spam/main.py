@@ -31,6 +31,17 @@ if __name__ == '__main__':
 			# Split un dataset en deux parties (apprentissage et test)
 			split_dataset_interface()
 		elif choix == "8":
+			# Fusionne plusieurs classifieurs sauvegardés.
+			classifieur_fusionne = fusionner_classifieurs_interface()
+			if classifieur_fusionne:
+				classifieur_courant = classifieur_fusionne
+		elif choix == "9":
+			# Choisit le seuil de décision du classifieur courant.
+			choisir_seuil_interface(classifieur_courant)
+		elif choix == "10":
+			# Compare plusieurs classifieurs sauvegardés sur une même base de test.
+			comparer_classifieurs_interface()
+		elif choix == "11":
 			print("Au revoir !")
 			break
 		else:
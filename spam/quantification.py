@@ -0,0 +1,189 @@
+import argparse
+import pickle
+import sys
+import time
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 								POIDS EN PRÉCISION RÉDUITE
+# ======================================================================================
+#
+# Le score d'un mail est biais + somme des poids des mots présents (voir poidsLogOdds).
+# Les poids peuvent être stockés en float32, float16 ou en int8 avec une échelle par
+# modèle, ce qui réduit la taille du modèle et la mémoire parcourue à chaque prédiction.
+#
+# Un modèle quantifié n'a plus bspam / bham : ce n'est pas un classifieur. Il est
+# sauvegardé à part, dans un fichier saves/<nom>.qnt hors du catalogue des classifieurs,
+# et se recharge avec chargerModeleQuantifie.
+
+PRECISIONS = ("float64", "float32", "float16", "int8")
+EXTENSION = ".qnt"
+
+
+'''
+	@brief	Calcule la représentation quantifiée des poids log-odds d'un classifieur.
+
+	@param classifieur : Classifieur.
+	@param precision : Une des PRECISIONS.
+
+	@return Dictionnaire {"precision", "biais", "poids", "echelle", "seuil"}. Le poids réel du mot j
+	vaut echelle * poids[j].
+'''
+def quantifierClassifieur(classifieur, precision = "float32"):
+	if precision not in PRECISIONS:
+		raise ValueError(f"Précision inconnue : {precision} (attendu : {', '.join(PRECISIONS)})")
+
+	biais, poids = poidsClassifieur(classifieur)
+
+	if precision == "int8":
+		echelle = max(float(np.max(np.abs(poids))), 1e-12) / 127
+		poids = np.rint(poids / echelle).astype(np.int8)
+	else:
+		echelle = 1.0
+		poids = poids.astype(precision)
+
+	return {"precision": precision, "biais": float(biais), "poids": poids, "echelle": echelle, "seuil": classifieur.get("seuil", 0)}
+
+
+'''
+	@brief	Prédit si un mail est un SPAM à partir de poids quantifiés.
+
+	@param x : Vecteur booléens des mots apparaissant dans le mail.
+	@param quantification : Résultat de quantifierClassifieur.
+
+	@return isSpam, Pspam_x, Pham_x
+'''
+def predictionQuantifiee(x, quantification):
+	poids = quantification["poids"]
+	accumulateur = np.int32 if poids.dtype == np.int8 else np.float32
+	score = quantification["biais"] + quantification["echelle"] * float(poids[x].sum(dtype=accumulateur))
+
+	Pspam_x = 1 / (1 + np.exp(-score))
+	return (score > quantification.get("seuil", 0)), Pspam_x, 1 - Pspam_x
+
+
+'''
+	@brief	Construit un modèle allégé ne contenant que ce qui est nécessaire à la prédiction
+	quantifiée (sans bspam / bham en float64). Il se sauvegarde et se charge avec
+	sauvegarderModeleQuantifie / chargerModeleQuantifie.
+
+	@return Le modèle allégé.
+'''
+def modeleQuantifie(classifieur, precision = "float32"):
+	return {
+		"dictionnaire": classifieur["dictionnaire"],
+		"mSpam": classifieur["mSpam"],
+		"mHam": classifieur["mHam"],
+		"lecteur": lecteurClassifieur(classifieur),
+		"quantification": quantifierClassifieur(classifieur, precision)
+	}
+
+
+'''
+	@brief	Sauvegarde un modèle quantifié (fichier temporaire puis remplacement).
+
+	@param nom : Nom du fichier, avec l'extension EXTENSION.
+
+	@return 1 en cas de succès, None sinon.
+'''
+def sauvegarderModeleQuantifie(modele, dossier = "saves", nom = "classifieur" + EXTENSION):
+	os.makedirs(dossier, exist_ok=True)
+	chemin = os.path.join(dossier, nom)
+	try:
+		with open(chemin + ".tmp", "wb") as f:
+			pickle.dump(modele, f)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(chemin + ".tmp", chemin)
+	except OSError as ex:
+		print(f"Le modèle quantifié n'a pas pu être sauvegardé : {ex}")
+		return None
+	return 1
+
+
+'''
+	@brief	Charge un modèle quantifié sauvegardé par sauvegarderModeleQuantifie.
+
+	@return Le modèle, None s'il n'existe pas ou n'est pas un modèle quantifié.
+'''
+def chargerModeleQuantifie(dossier = "saves", nom = "classifieur" + EXTENSION):
+	chemin = os.path.join(dossier, nom)
+	if not os.path.exists(chemin):
+		print(f"Erreur -> Aucun fichier de ce type : {nom}")
+		return None
+	with open(chemin, "rb") as f:
+		modele = pickle.load(f)
+	if "quantification" not in modele:
+		print(f"Erreur -> {nom} n'est pas un modèle quantifié.")
+		return None
+	return modele
+
+
+'''
+	@brief	Erreur de test (en %) d'un modèle quantifié sur une base, les mails étant lus avec
+	le lecteur du modèle.
+'''
+def testModeleQuantifie(modele, base = "basetest"):
+	mails = mails_etiquetes(base)
+	lecteur = lecteurClassifieur(modele)
+	erreurs = sum(
+		predictionQuantifiee(lireMail(chemin, modele["dictionnaire"], lecteur), modele["quantification"])[0] != isSpam
+		for chemin, isSpam in mails
+	)
+	return 100 * erreurs / max(len(mails), 1)
+
+
+'''
+	@brief	Mesure, pour chaque précision, le taux de décisions différentes de la prédiction
+	float64 sur une base de test, l'erreur de test, le débit et la taille du modèle allégé.
+'''
+def mesurer_desaccord(classifieur, base = "basetest", precisions = PRECISIONS):
+	mails = mails_etiquetes(base)
+	Pspam, Pham, bspam, bham, dictionnaire = (classifieur[k] for k in ["Pspam", "Pham", "bspam", "bham", "dictionnaire"])
+	vecteurs = [lireMail(chemin, dictionnaire, lecteurClassifieur(classifieur)) for chemin, _ in mails]
+	labels = [isSpam for _, isSpam in mails]
+
+	debut = time.perf_counter()
+	references = [prediction(x, Pspam, Pham, bspam, bham, classifieur.get("seuil", 0), classifieur.get("biais_elague", 0))[0] for x in vecteurs]
+	duree = time.perf_counter() - debut
+	erreurs = sum(r != l for r, l in zip(references, labels))
+	taille = len(pickle.dumps(classifieur))
+	print(f"{'référence':>10} : erreur {100 * erreurs / len(mails):.2f} %  {1e6 * duree / len(mails):.1f} µs/mail  modèle {taille} octets")
+
+	for precision in precisions:
+		modele = modeleQuantifie(classifieur, precision)
+		debut = time.perf_counter()
+		decisions = [predictionQuantifiee(x, modele["quantification"])[0] for x in vecteurs]
+		duree = time.perf_counter() - debut
+
+		desaccords = sum(d != r for d, r in zip(decisions, references))
+		erreurs = sum(d != l for d, l in zip(decisions, labels))
+		taille = len(pickle.dumps(modele))
+		print(f"{precision:>10} : désaccord {100 * desaccords / len(mails):.2f} %  erreur {100 * erreurs / len(mails):.2f} %"
+			f"  {1e6 * duree / len(mails):.1f} µs/mail  modèle {taille} octets")
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Quantification des poids d'un classifieur.")
+	parser.add_argument("classifieur", help=f"Classifieur de saves/ à quantifier, ou modèle quantifié ({EXTENSION}) à tester.")
+	parser.add_argument("--base", default="basetest", help="Base de test (sous-dossiers spam/ et ham/).")
+	parser.add_argument("--precision", choices=PRECISIONS, help=f"Sauvegarde le modèle allégé dans cette précision (fichier {EXTENSION}).")
+	parser.add_argument("--nom", help="Nom du modèle allégé sauvegardé dans saves/.")
+	args = parser.parse_args()
+
+	if args.classifieur.endswith(EXTENSION):
+		modele = chargerModeleQuantifie(nom=args.classifieur)
+		if modele is not None:
+			print(f"{args.classifieur} ({modele['quantification']['precision']}) : erreur de test {testModeleQuantifie(modele, args.base):.2f} %")
+		sys.exit(0 if modele is not None else 1)
+
+	classifieur = chargerClassifieur(nom=args.classifieur)
+	if classifieur is not None:
+		mesurer_desaccord(classifieur, args.base)
+		if args.precision:
+			nom = args.nom or args.classifieur.replace(".pkl", "") + f"_{args.precision}"
+			if not nom.endswith(EXTENSION):
+				nom += EXTENSION
+			if sauvegarderModeleQuantifie(modeleQuantifie(classifieur, args.precision), nom=nom):
+				print(f"Modèle {args.precision} sauvegardé sous {nom}.")
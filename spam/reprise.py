@@ -0,0 +1,290 @@
+import argparse
+import hashlib
+import json
+import pickle
+import sys
+import time
+
+from bayes_classifier import *
+
+# ======================================================================================
+# 					POINTS DE REPRISE DE L'APPRENTISSAGE ET DE L'ÉVALUATION
+# ======================================================================================
+#
+# L'apprentissage et l'évaluation parcourent les mails dans un ordre fixé (noms triés,
+# SPAM puis HAM) et enregistrent régulièrement leur état (curseur, comptes partiels,
+# matrice de confusion) dans un fichier de reprise. Une exécution reprise repart du
+# dernier point enregistré et donne exactement le même résultat qu'une exécution sans
+# interruption.
+#
+# Le journal d'ingestion des mails déjà comptés (voir journalClassifieur) grandit d'une
+# entrée par mail : il n'est pas dans l'état, qui serait réécrit en entier à chaque point.
+# Ses entrées sont ajoutées à un fichier à part (<reprise>.journal) juste avant chaque point,
+# qui note la taille confirmée du fichier ; une reprise coupe le fichier à cette taille.
+# Chaque point ne coûte donc que les entrées depuis le point précédent.
+
+INTERVALLE = 60 # Secondes entre deux points de reprise
+AFFICHAGE = 500 # Nombre de mails entre deux affichages de la progression
+
+
+'''
+	@brief	Liste ordonnée des mails à traiter et identifiant du travail : un point de reprise
+	n'est réutilisé que pour les mêmes mails, le même dictionnaire et le même lecteur.
+
+	@return (taches, identifiant) où taches est une liste de (chemin, isSpam).
+'''
+def taches(dossier_spams, dossier_hams, dictionnaire, lecteur = "texte"):
+	liste = [(os.path.join(dossier_spams, f), True) for f in sorted(os.listdir(dossier_spams))]
+	liste += [(os.path.join(dossier_hams, f), False) for f in sorted(os.listdir(dossier_hams))]
+
+	empreinte = hashlib.blake2b(digest_size=16)
+	for chemin, isSpam in liste:
+		empreinte.update(f"{chemin}\0{isSpam}\n".encode())
+	empreinte.update("\n".join(dictionnaire).encode())
+	empreinte.update(f"\0{lecteur}".encode())
+	return liste, empreinte.hexdigest()
+
+
+'''
+	@brief	Enregistre un point de reprise (écriture dans un fichier temporaire puis remplacement).
+'''
+def enregistrerReprise(chemin_reprise, etat):
+	with open(chemin_reprise + ".tmp", "wb") as f:
+		pickle.dump(etat, f)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(chemin_reprise + ".tmp", chemin_reprise)
+
+
+'''
+	@brief	Charge un point de reprise s'il existe et correspond au travail demandé.
+
+	@return L'état enregistré, None sinon.
+'''
+def chargerReprise(chemin_reprise, identifiant):
+	if not os.path.exists(chemin_reprise):
+		return None
+	with open(chemin_reprise, "rb") as f:
+		etat = pickle.load(f)
+	if etat.get("identifiant") != identifiant:
+		print("Le point de reprise ne correspond pas à ce travail : il est ignoré.")
+		return None
+	return etat
+
+
+'''
+	@brief	Affiche une ligne de progression avec le débit mesuré et le temps restant estimé.
+
+	@param fait : Nombre de mails traités au total.
+	@param total : Nombre total de mails.
+	@param debut : Instant de départ de l'exécution courante.
+	@param depart : Nombre de mails déjà traités au départ de l'exécution courante.
+'''
+def afficherProgression(fait, total, debut, depart):
+	duree = time.perf_counter() - debut
+	debit = (fait - depart) / duree if duree > 0 else 0
+	restant = (total - fait) / debit if debit > 0 else 0
+	minutes, secondes = divmod(int(restant), 60)
+	heures, minutes = divmod(minutes, 60)
+	sys.stdout.write(f"\r{fait}/{total} ({100 * fait / max(total, 1):.1f} %)  {debit:.1f} mails/s  reste {heures:02d}:{minutes:02d}:{secondes:02d} ")
+	sys.stdout.flush()
+
+
+'''
+	@brief	Parcourt des tâches à partir du curseur d'un état, en appelant traiter(etat, chemin,
+	isSpam) pour chacune et en enregistrant régulièrement l'état. Un Ctrl-C peut tomber au
+	milieu d'un traitement (comptes modifiés, curseur pas encore avancé) : l'état n'est donc
+	pas enregistré à ce moment, la reprise repart du dernier point enregistré.
+
+	@param intervalle : Secondes entre deux points de reprise.
+	@param avant_point : Fonction appelée avec l'état juste avant chaque point de reprise
+	(par exemple pour écrire sur disque ce qui n'est pas dans l'état).
+'''
+def parcourir(liste, etat, traiter, chemin_reprise, intervalle, avant_point = None):
+	debut = time.perf_counter()
+	dernier_point = debut
+	depart = etat["curseur"]
+
+	try:
+		while etat["curseur"] < len(liste):
+			chemin, isSpam = liste[etat["curseur"]]
+			traiter(etat, chemin, isSpam)
+			etat["curseur"] += 1
+
+			if etat["curseur"] % AFFICHAGE == 0:
+				afficherProgression(etat["curseur"], len(liste), debut, depart)
+			if time.perf_counter() - dernier_point >= intervalle:
+				if avant_point is not None:
+					avant_point(etat)
+				enregistrerReprise(chemin_reprise, etat)
+				dernier_point = time.perf_counter()
+	except KeyboardInterrupt:
+		if os.path.exists(chemin_reprise):
+			print(f"\nInterrompu : la reprise repartira du dernier point enregistré dans {chemin_reprise}.")
+		else:
+			print("\nInterrompu avant le premier point de reprise : la reprise repartira du début.")
+		raise
+
+	afficherProgression(etat["curseur"], len(liste), debut, depart)
+	print()
+
+
+'''
+	@brief	Ajoute les entrées d'un journal d'ingestion à la fin du fichier de journal d'une
+	reprise (une ligne JSON par mail) et les confirme sur disque.
+
+	@return Taille du fichier après l'ajout.
+'''
+def ajouterJournalReprise(chemin, journal):
+	with open(chemin, "ab") as f:
+		f.write("".join(
+			json.dumps([chemin_mail, list(signature), empreinte, journal["empreintes"][empreinte]]) + "\n"
+			for chemin_mail, (signature, empreinte) in journal["fichiers"].items()
+		).encode())
+		f.flush()
+		os.fsync(f.fileno())
+		return f.tell()
+
+
+'''
+	@brief	Relit le fichier de journal d'une reprise (voir ajouterJournalReprise).
+
+	@return Le journal d'ingestion.
+'''
+def lireJournalReprise(chemin):
+	journal = {"empreintes": {}, "fichiers": {}}
+	with open(chemin, "rb") as f:
+		for ligne in f:
+			chemin_mail, signature, empreinte, isSpam = json.loads(ligne)
+			journal["empreintes"][empreinte] = isSpam
+			journal["fichiers"][chemin_mail] = (tuple(signature), empreinte)
+	return journal
+
+
+'''
+	@brief	Apprend un classifieur avec points de reprise.
+
+	@param chemin_reprise : Fichier de reprise (le journal d'ingestion va dans chemin_reprise + ".journal").
+	@param reprendre : Repart du point de reprise s'il existe.
+	@param intervalle : Secondes entre deux points de reprise.
+	@param lecteur : Lecteur des mails (voir LECTEURS), noté dans le classifieur.
+
+	@return Le classifieur.
+'''
+def entrainerAvecReprise(dossier_spams, dossier_hams, dictionnaire, chemin_reprise, reprendre = False, intervalle = INTERVALLE, lecteur = "texte"):
+	verifierLecteur(lecteur)
+	liste, identifiant = taches(dossier_spams, dossier_hams, dictionnaire, lecteur)
+	chemin_journal = chemin_reprise + ".journal"
+
+	etat = chargerReprise(chemin_reprise, identifiant) if reprendre else None
+	if etat is not None and "octets_journal" not in etat:
+		print("Le point de reprise est d'un format plus ancien : il est ignoré.")
+		etat = None
+	if etat is None:
+		m = len(dictionnaire)
+		etat = {"identifiant": identifiant, "curseur": 0, "nspam": np.zeros(m), "nham": np.zeros(m), "mSpam": 0, "mHam": 0, "octets_journal": 0}
+	else:
+		print(f"Reprise de l'apprentissage au mail {etat['curseur']}/{len(liste)}.")
+
+	# Les entrées écrites après le dernier point de reprise sont retirées
+	open(chemin_journal, "ab").close()
+	os.truncate(chemin_journal, etat["octets_journal"])
+	tampon = {"empreintes": {}, "fichiers": {}} # Entrées depuis le dernier point
+
+	def avant_point(etat):
+		etat["octets_journal"] = ajouterJournalReprise(chemin_journal, tampon)
+		tampon["empreintes"].clear()
+		tampon["fichiers"].clear()
+
+	def traiter(etat, chemin, isSpam):
+		x = lireMailJournal(chemin, dictionnaire, lecteur, tampon, isSpam)
+		if isSpam:
+			etat["nspam"] += x
+			etat["mSpam"] += 1
+		else:
+			etat["nham"] += x
+			etat["mHam"] += 1
+
+	parcourir(liste, etat, traiter, chemin_reprise, intervalle, avant_point)
+	avant_point(etat)
+	journal = lireJournalReprise(chemin_journal)
+	for chemin in (chemin_reprise, chemin_journal):
+		if os.path.exists(chemin):
+			os.remove(chemin)
+
+	return classifieurDepuisComptes(dictionnaire, etat["nspam"], etat["mSpam"], etat["nham"], etat["mHam"], lecteur, journal)
+
+
+'''
+	@brief	Évalue un classifieur avec points de reprise.
+
+	@return Dictionnaire de la matrice de confusion {"vp", "fn", "fp", "vn"} (le SPAM étant
+	la classe positive).
+'''
+def evaluerAvecReprise(classifieur, dossier_spams, dossier_hams, chemin_reprise, reprendre = False, intervalle = INTERVALLE):
+	dictionnaire = classifieur["dictionnaire"]
+	biais, poids = poidsClassifieur(classifieur)
+	seuil = classifieur.get("seuil", 0)
+	lecteur = lecteurClassifieur(classifieur)
+	liste, identifiant = taches(dossier_spams, dossier_hams, dictionnaire, lecteur)
+
+	# Le modèle fait partie du travail : on ne reprend pas l'évaluation d'un autre modèle
+	identifiant = hashlib.blake2b((identifiant + repr((biais, seuil, lecteur)) + poids.tobytes().hex()).encode(), digest_size=16).hexdigest()
+
+	etat = chargerReprise(chemin_reprise, identifiant) if reprendre else None
+	if etat is None:
+		etat = {"identifiant": identifiant, "curseur": 0, "vp": 0, "fn": 0, "fp": 0, "vn": 0}
+	else:
+		print(f"Reprise de l'évaluation au mail {etat['curseur']}/{len(liste)}.")
+
+	def traiter(etat, chemin, isSpam):
+		isSpam_pred = biais + poids[lireMail(chemin, dictionnaire, lecteur)].sum() > seuil
+		cle = ("vp" if isSpam_pred else "fn") if isSpam else ("fp" if isSpam_pred else "vn")
+		etat[cle] += 1
+
+	parcourir(liste, etat, traiter, chemin_reprise, intervalle)
+	if os.path.exists(chemin_reprise):
+		os.remove(chemin_reprise)
+
+	return {cle: etat[cle] for cle in ("vp", "fn", "fp", "vn")}
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description="Apprentissage et évaluation avec points de reprise.")
+	commandes = parser.add_subparsers(dest="commande", required=True)
+
+	entrainer = commandes.add_parser("entrainer", help="Apprend un classifieur et le sauvegarde dans saves/.")
+	entrainer.add_argument("--spams", default="baseapp/spam", help="Dossier des SPAM d'apprentissage.")
+	entrainer.add_argument("--hams", default="baseapp/ham", help="Dossier des HAM d'apprentissage.")
+	entrainer.add_argument("--dico", default="dics/dictionnaire1000en.txt", help="Dictionnaire à utiliser.")
+	entrainer.add_argument("--nom", default="classifieur.pkl", help="Nom du classifieur sauvegardé dans saves/.")
+	entrainer.add_argument("--lecteur", choices=LECTEURS, default="texte", help="Lecteur des mails (mime : parties texte décodées).")
+
+	evaluer = commandes.add_parser("evaluer", help="Évalue un classifieur de saves/.")
+	evaluer.add_argument("classifieur", help="Classifieur de saves/ à évaluer.")
+	evaluer.add_argument("--spams", default="basetest/spam", help="Dossier des SPAM de test.")
+	evaluer.add_argument("--hams", default="basetest/ham", help="Dossier des HAM de test.")
+
+	for commande in (entrainer, evaluer):
+		commande.add_argument("--resume", action="store_true", help="Reprend depuis le dernier point de reprise.")
+		commande.add_argument("--intervalle", type=float, default=INTERVALLE, help="Secondes entre deux points de reprise.")
+	args = parser.parse_args()
+
+	os.makedirs("saves", exist_ok=True)
+	try:
+		if args.commande == "entrainer":
+			chemin_reprise = os.path.join("saves", args.nom + ".reprise")
+			classifieur = entrainerAvecReprise(args.spams, args.hams, charge_dico(args.dico), chemin_reprise, args.resume, args.intervalle, args.lecteur)
+			if sauvegarderClassifieur(classifieur, nom=args.nom):
+				print(f"Classifieur sauvegardé sous {args.nom}.")
+		else:
+			classifieur = chargerClassifieur(nom=args.classifieur)
+			if classifieur is not None:
+				chemin_reprise = os.path.join("saves", args.classifieur + ".eval.reprise")
+				confusion = evaluerAvecReprise(classifieur, args.spams, args.hams, chemin_reprise, args.resume, args.intervalle)
+				nb_spams, nb_hams = confusion["vp"] + confusion["fn"], confusion["fp"] + confusion["vn"]
+				print(f"Erreur de test sur {nb_spams} SPAM : {100 * confusion['fn'] / max(nb_spams, 1):.2f} %")
+				print(f"Erreur de test sur {nb_hams} HAM : {100 * confusion['fp'] / max(nb_hams, 1):.2f} %")
+				print(f"Erreur de test globale sur {nb_spams + nb_hams} mails : {100 * (confusion['fn'] + confusion['fp']) / max(nb_spams + nb_hams, 1):.2f} %")
+	except KeyboardInterrupt:
+		sys.exit(130)
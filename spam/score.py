@@ -0,0 +1,214 @@
+import bisect
+import struct
+import sys
+
+# ======================================================================================
+# 								SCORE : POINT D'ENTRÉE LÉGER
+# ======================================================================================
+#
+# Classe des mails à partir d'un modèle compilé, sans importer NumPy ni le reste du
+# projet, pour limiter le temps de démarrage quand un processus est lancé par mail.
+#
+# Usage :
+#	python score.py <modele.mdl> [mail ...]			(sans mail : lit l'entrée standard)
+#	python score.py --compiler <classifieur.pkl> <modele.mdl>
+#
+# Format du modèle compilé (entiers et flottants 64 bits little-endian) :
+#	SPAMMDL2\n
+#	<biais> <seuil> <nombre de mots distincts u> <lecteur>\n, complété par des \0 jusqu'à
+#	un multiple de 8 octets
+#	positions (u + 1 entiers), poids (u flottants), mots (UTF-8 bout à bout, triés)
+# Les mots sont cherchés par dichotomie directement dans le fichier projeté en mémoire :
+# le chargement ne décode aucun mot et son coût ne dépend pas de la taille du vocabulaire.
+# L'ancien format SPAMMDL1 (mots un par ligne, puis les poids) reste lisible.
+
+ENTETE = b"SPAMMDL2\n"
+ENTETE_V1 = b"SPAMMDL1\n"
+
+
+'''
+	@brief	Compile un classifieur sauvegardé en modèle de scoring (poids log-odds) lisible
+	sans pickle ni NumPy.
+
+	@param nom : Nom du classifieur dans saves/.
+	@param chemin_modele : Chemin du modèle compilé à écrire.
+'''
+def compiler_modele(nom, chemin_modele):
+	from bayes_classifier import chargerClassifieur
+
+	classifieur = chargerClassifieur(nom=nom)
+	if classifieur is None:
+		return None
+	return ecrire_modele(classifieur, chemin_modele)
+
+
+'''
+	@brief	Écrit le modèle compilé d'un classifieur.
+
+	@param classifieur : Classifieur.
+	@param chemin_modele : Chemin du modèle compilé à écrire.
+'''
+def ecrire_modele(classifieur, chemin_modele):
+	import numpy as np
+	from bayes_classifier import poidsClassifieur
+
+	biais, poids = poidsClassifieur(classifieur)
+	seuil = classifieur.get("seuil", 0.0)
+	lecteur = classifieur.get("lecteur", "texte")
+
+	# En cas de doublon, c'est la première occurrence du mot qui compte (comme dans vecteurMots)
+	premiers = {}
+	for i, mot in enumerate(classifieur["dictionnaire"]):
+		premiers.setdefault(mot.encode(), i)
+	tries = sorted(premiers)
+	positions = np.cumsum([0] + [len(mot) for mot in tries])
+
+	entete = ENTETE + f"{float(biais)!r} {float(seuil)!r} {len(tries)} {lecteur}\n".encode()
+	with open(chemin_modele, "wb") as f:
+		f.write(entete + b"\0" * (-len(entete) % 8))
+		f.write(np.asarray(positions, dtype="<i8").tobytes())
+		f.write(np.asarray(poids[[premiers[mot] for mot in tries]], dtype="<f8").tobytes())
+		f.write(b"".join(tries))
+	return 1
+
+
+class MotsTries:
+	'''
+		@brief	Poids des mots d'un modèle compilé, lus à la demande dans le fichier projeté en
+		mémoire. Se comporte comme une suite de mots triés (pour bisect) et s'interroge comme
+		un dictionnaire (get).
+	'''
+
+	def __init__(self, contenu, debut, u):
+		self.contenu = contenu
+		self.u = u
+		self.debut_positions = debut
+		self.debut_poids = debut + 8 * (u + 1)
+		self.debut_mots = self.debut_poids + 8 * u
+
+	def __len__(self):
+		return self.u
+
+	def position(self, i):
+		return int.from_bytes(self.contenu[self.debut_positions + 8 * i:self.debut_positions + 8 * i + 8], "little")
+
+	def __getitem__(self, i):
+		return self.contenu[self.debut_mots + self.position(i):self.debut_mots + self.position(i + 1)]
+
+	'''
+		@brief	Poids d'un mot, defaut s'il n'est pas dans le modèle.
+	'''
+	def get(self, mot, defaut = 0.0):
+		mot = mot.encode()
+		i = bisect.bisect_left(self, mot)
+		if i < self.u and self[i] == mot:
+			return struct.unpack_from("<d", self.contenu, self.debut_poids + 8 * i)[0]
+		return defaut
+
+
+'''
+	@brief	Charge un modèle compilé.
+
+	@param chemin_modele : Chemin du modèle compilé.
+
+	@return (biais, seuil, poids, lecteur) où poids donne le poids log-odds de chaque mot
+	(poids.get(mot, 0.0), voir MotsTries) et lecteur est le lecteur de mails du classifieur
+	compilé ("texte" ou "mime").
+'''
+def charger_modele(chemin_modele):
+	import mmap
+
+	with open(chemin_modele, "rb") as f:
+		contenu = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+	if contenu[:len(ENTETE)] not in (ENTETE, ENTETE_V1):
+		raise ValueError(f"{chemin_modele} n'est pas un modèle compilé.")
+
+	fin_entete = contenu.find(b"\n", len(ENTETE))
+	champs = contenu[len(ENTETE):fin_entete].decode().split()
+	biais, seuil, n = champs[:3]
+	lecteur = champs[3] if len(champs) > 3 else "texte"
+	n = int(n)
+
+	if contenu[:len(ENTETE)] == ENTETE:
+		return float(biais), float(seuil), MotsTries(contenu, fin_entete + 1 + (-(fin_entete + 1) % 8), n), lecteur
+	return float(biais), float(seuil), lireModeleV1(contenu[:], fin_entete, n), lecteur
+
+
+'''
+	@brief	Lit les poids d'un modèle compilé à l'ancien format SPAMMDL1.
+
+	@return Dictionnaire associant chaque mot à son poids log-odds.
+'''
+def lireModeleV1(contenu, fin_entete, n):
+	from array import array
+
+	debut_mots = fin_entete + 1
+	debut_poids = len(contenu) - 8 * n
+	mots = contenu[debut_mots:debut_poids].decode().split("\n")[:n]
+	poids = array("d")
+	poids.frombytes(contenu[debut_poids:])
+	if sys.byteorder != "little":
+		poids.byteswap()
+
+	# En cas de doublon, c'est la première occurrence du mot qui compte (comme dans vecteurMots)
+	return dict(zip(reversed(mots), reversed(poids)))
+
+
+'''
+	@brief	Calcule le score log-odds d'un mail, avec le même lecteur et le même découpage en
+	mots que lireMail.
+
+	@param contenu : Mail brut (octets ou chaîne).
+
+	@return (isSpam, Pspam_x)
+'''
+def scorer(contenu, modele):
+	import math
+	import re
+
+	biais, seuil, poids, lecteur = modele
+	if lecteur == "mime":
+		from lecture_mime import MAX_OCTETS_LUS, texteMime # Sans NumPy
+
+		if isinstance(contenu, str):
+			contenu = contenu.encode("utf-8", errors="ignore")
+		texte = texteMime(contenu[:MAX_OCTETS_LUS])
+	else:
+		if isinstance(contenu, bytes):
+			contenu = contenu.decode("utf-8", errors="ignore")
+		texte = contenu.lower()
+	texte = re.sub(r'[^a-z\s]', ' ', texte)
+	score = biais + sum(poids.get(mot, 0.0) for mot in set(re.findall(r'\b[a-z]{3,}\b', texte)))
+
+	# Sigmoïde sans dépassement de capacité
+	if score >= 0:
+		Pspam_x = 1 / (1 + math.exp(-score))
+	else:
+		Pspam_x = math.exp(score) / (1 + math.exp(score))
+	return score > seuil, Pspam_x
+
+
+def main(arguments):
+	if len(arguments) == 3 and arguments[0] == "--compiler":
+		return 0 if compiler_modele(arguments[1], arguments[2]) else 1
+	if not arguments:
+		print("Usage : python score.py <modele.mdl> [mail ...]", file=sys.stderr)
+		return 2
+
+	modele = charger_modele(arguments[0])
+	mails = arguments[1:]
+
+	if not mails:
+		isSpam, Pspam_x = scorer(sys.stdin.buffer.read(), modele)
+		print(f"-\t{'SPAM' if isSpam else 'HAM'}\t{Pspam_x:.6f}")
+		return 0
+
+	for chemin in mails:
+		with open(chemin, "rb") as f:
+			isSpam, Pspam_x = scorer(f.read(), modele)
+		print(f"{chemin}\t{'SPAM' if isSpam else 'HAM'}\t{Pspam_x:.6f}")
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
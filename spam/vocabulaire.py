@@ -0,0 +1,236 @@
+import mmap
+import os
+import struct
+
+import numpy as np
+
+# ======================================================================================
+# 							VOCABULAIRE COMPACT
+# ======================================================================================
+#
+# Un dictionnaire de plusieurs millions de mots coûte cher en list[str] : chaque mot est un
+# objet Python, et tout est recréé au dépicklage. Le vocabulaire compact range les mots
+# encodés en UTF-8 bout à bout dans un seul tableau d'octets, repérés par un tableau de
+# positions. La recherche se fait par dichotomie dans une permutation triée des mots ; un
+# préfixe de 8 octets par mot (entier big-endian, dans le même ordre) permet de chercher
+# tous les mots d'un mail d'un coup avec np.searchsorted, les comparaisons complètes
+# n'étant faites que pour les mots partageant ce préfixe.
+#
+# Format du fichier (entiers 64 bits little-endian, tableaux alignés sur 8 octets) :
+#	ENTETE, n (nombre de mots), u (nombre de mots distincts), taille (octets des mots)
+#	positions (n + 1), prefixes (u), ordre (u), mots (taille octets)
+# Le chargement projette le fichier en mémoire (mmap) sans rien copier.
+
+ENTETE = b"SPAMVOC1"
+FORMAT_ENTETE = "<8sQQQ"
+
+
+'''
+	@brief	Préfixes de 8 octets de mots encodés, sous forme d'entiers comparables dans l'ordre
+	des octets (les mots plus courts sont complétés par des zéros).
+'''
+def prefixes(mots_encodes):
+	return np.array(mots_encodes, dtype="S8").view(">u8").astype(np.uint64)
+
+
+class Vocabulaire:
+	'''
+		@brief	Vocabulaire compact, utilisable à la place de la liste du dictionnaire (len,
+		indexation, itération, index) avec en plus la recherche par lot (indices).
+	'''
+
+	def __init__(self, positions, prefixes, ordre, mots):
+		self.positions = positions	# positions[i]:positions[i + 1] = octets du mot i
+		self.prefixes = prefixes	# Préfixes des mots distincts, triés
+		self.ordre = ordre			# ordre[k] = indice du k-ième mot distinct dans l'ordre trié
+		self.mots = mots			# Mots encodés bout à bout (bytes, memoryview ou mmap)
+
+	def __len__(self):
+		return len(self.positions) - 1
+
+	def octets(self, i):
+		return bytes(self.mots[self.positions[i]:self.positions[i + 1]])
+
+	def __getitem__(self, i):
+		if isinstance(i, slice):
+			return [self[j] for j in range(*i.indices(len(self)))]
+		if i < 0:
+			i += len(self)
+		if not 0 <= i < len(self):
+			raise IndexError("indice hors du vocabulaire")
+		return self.octets(i).decode("utf-8")
+
+	def __iter__(self):
+		for i in range(len(self)):
+			yield self.octets(i).decode("utf-8")
+
+	def __eq__(self, autre):
+		if isinstance(autre, Vocabulaire):
+			return np.array_equal(self.positions, autre.positions) and bytes(self.mots) == bytes(autre.mots)
+		try:
+			return len(self) == len(autre) and all(a == b for a, b in zip(self, autre))
+		except TypeError:
+			return NotImplemented
+
+	__hash__ = None
+
+	def __getstate__(self):
+		return {"positions": np.array(self.positions), "prefixes": np.array(self.prefixes), "ordre": np.array(self.ordre), "mots": bytes(self.mots)}
+
+	def __setstate__(self, etat):
+		self.__dict__.update(etat)
+
+	'''
+		@brief	Cherche un mot encodé entre les rangs g et d de l'ordre trié.
+
+		@return Son indice dans le dictionnaire, -1 s'il est absent.
+	'''
+	def chercher(self, mot, g, d):
+		while g < d:
+			milieu = (g + d) // 2
+			courant = self.octets(self.ordre[milieu])
+			if courant < mot:
+				g = milieu + 1
+			elif courant > mot:
+				d = milieu
+			else:
+				return int(self.ordre[milieu])
+		return -1
+
+	'''
+		@brief	Indice d'un mot (première occurrence), comme list.index.
+	'''
+	def index(self, mot):
+		encode = mot.encode("utf-8")
+		p = prefixes([encode])
+		i = self.chercher(encode, int(np.searchsorted(self.prefixes, p[0], "left")), int(np.searchsorted(self.prefixes, p[0], "right")))
+		if i < 0:
+			raise ValueError(f"{mot!r} n'est pas dans le vocabulaire")
+		return i
+
+	def __contains__(self, mot):
+		try:
+			self.index(mot)
+			return True
+		except ValueError:
+			return False
+
+	'''
+		@brief	Recherche par lot des mots d'un mail.
+
+		@param mots : Mots (chaînes) à chercher, éventuellement répétés.
+
+		@return Tableau des indices des mots présents dans le vocabulaire (sans doublons).
+	'''
+	def indices(self, mots):
+		distincts = [mot.encode("utf-8") for mot in set(mots)]
+		if not distincts:
+			return np.zeros(0, dtype=np.int64)
+
+		p = prefixes(distincts)
+		gauches = np.searchsorted(self.prefixes, p, "left")
+		droites = np.searchsorted(self.prefixes, p, "right")
+
+		trouves = []
+		for mot, g, d in zip(distincts, gauches.tolist(), droites.tolist()):
+			if d - g == 1 and len(mot) < 8:
+				trouves.append(int(self.ordre[g])) # Le préfixe complété par des zéros est le mot entier
+			elif d > g:
+				i = self.chercher(mot, g, d)
+				if i >= 0:
+					trouves.append(i)
+		return np.array(trouves, dtype=np.int64)
+
+	'''
+		@brief	Taille en octets des tableaux du vocabulaire.
+	'''
+	def taille(self):
+		return self.positions.nbytes + self.prefixes.nbytes + self.ordre.nbytes + len(self.mots)
+
+
+'''
+	@brief	Construit un vocabulaire compact à partir d'une liste de mots (par exemple celle
+	renvoyée par charge_dico). L'ordre et les indices des mots sont conservés.
+
+	@return Le vocabulaire.
+'''
+def creerVocabulaire(dictionnaire):
+	encodes = [mot.encode("utf-8") for mot in dictionnaire]
+
+	positions = np.zeros(len(encodes) + 1, dtype=np.int64)
+	np.cumsum([len(mot) for mot in encodes], out=positions[1:])
+
+	# Pour un mot répété, seule la première occurrence est cherchable, comme avec list.index
+	premiers = {}
+	for i, mot in enumerate(encodes):
+		premiers.setdefault(mot, i)
+	tries = sorted(premiers)
+	ordre = np.array([premiers[mot] for mot in tries], dtype=np.int64)
+
+	return Vocabulaire(positions, prefixes(tries), ordre, b"".join(encodes))
+
+
+'''
+	@brief	Contenu du fichier d'un vocabulaire compact (voir le format plus haut).
+
+	@param vocabulaire : Vocabulaire compact ou liste de mots.
+
+	@return Le contenu en octets.
+'''
+def octetsVocabulaire(vocabulaire):
+	if not isinstance(vocabulaire, Vocabulaire):
+		vocabulaire = creerVocabulaire(vocabulaire)
+
+	return b"".join((
+		struct.pack(FORMAT_ENTETE, ENTETE, len(vocabulaire), len(vocabulaire.ordre), len(vocabulaire.mots)),
+		np.asarray(vocabulaire.positions, dtype="<i8").tobytes(),
+		np.asarray(vocabulaire.prefixes, dtype="<u8").tobytes(),
+		np.asarray(vocabulaire.ordre, dtype="<i8").tobytes(),
+		bytes(vocabulaire.mots),
+	))
+
+
+'''
+	@brief	Écrit un vocabulaire compact dans un fichier (fichier temporaire synchronisé sur
+	le disque puis remplacement).
+
+	@param vocabulaire : Vocabulaire compact, liste de mots ou contenu déjà calculé par
+	octetsVocabulaire.
+'''
+def ecrireVocabulaire(vocabulaire, chemin):
+	contenu = vocabulaire if isinstance(vocabulaire, bytes) else octetsVocabulaire(vocabulaire)
+	with open(chemin + ".tmp", "wb") as f:
+		f.write(contenu)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(chemin + ".tmp", chemin)
+
+
+'''
+	@brief	Charge un vocabulaire compact sans copie : les tableaux sont des vues sur le
+	fichier projeté en mémoire.
+
+	@return Le vocabulaire, None en cas d'erreur.
+'''
+def chargerVocabulaire(chemin):
+	try:
+		with open(chemin, "rb") as f:
+			projection = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+	except (OSError, ValueError) as ex:
+		print(f"Erreur lors du chargement du vocabulaire {chemin} : {ex}")
+		return None
+
+	entete, n, u, taille = struct.unpack_from(FORMAT_ENTETE, projection)
+	if entete != ENTETE:
+		print(f"Erreur -> {chemin} n'est pas un vocabulaire compact.")
+		return None
+
+	debut = struct.calcsize(FORMAT_ENTETE)
+	positions = np.frombuffer(projection, dtype="<i8", count=n + 1, offset=debut)
+	debut += 8 * (n + 1)
+	prefixes_tries = np.frombuffer(projection, dtype="<u8", count=u, offset=debut)
+	debut += 8 * u
+	ordre = np.frombuffer(projection, dtype="<i8", count=u, offset=debut)
+	debut += 8 * u
+
+	return Vocabulaire(positions, prefixes_tries, ordre, memoryview(projection)[debut:debut + taille])